@@ -1,15 +1,22 @@
 """Contains tools for binary operations between GeoGraph objects."""
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Dict, List, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
 
 import geopandas as gpd
+import numpy as np
+import shapely
 from shapely.geometry.base import BaseGeometry
 from shapely.geometry.polygon import Polygon
 
 import geograph.utils.geopandas_utils as gpd_utils
 from geograph.utils.polygon_utils import EMPTY_POLYGON, collapse_empty_polygon
 
+try:
+    import numba
+except ImportError:
+    numba = None
+
 if TYPE_CHECKING:
     import geograph
 
@@ -21,27 +28,93 @@ class NodeMap:
         self,
         src_graph: geograph.GeoGraph,
         trg_graph: geograph.GeoGraph,
-        mapping: Dict[int, List[int]],
+        mapping: Union[Dict[int, List[int]], Tuple[np.ndarray, np.ndarray]],
     ) -> None:
         """
         Class to store node mappings between two graphs (`trg_graph` and `src_graph`).
 
-        This class stores a dictionary of node one-to-many relationships of nodes from
-        `src_graph` to `trg_graph`. It also provides support for convenient methods for
+        This class stores the node one-to-many relationships of nodes from `src_graph`
+        to `trg_graph`. It also provides support for convenient methods for
         inverting the mapping and bundles the mapping information with references to
         the `src_graph` and `trg_graph`
 
+        Internally, the mapping is stored in compressed sparse row (CSR) format as
+        two integer arrays `indptr` and `indices`: The nodes at `iloc` position
+        `indices[indptr[i]:indptr[i+1]]` in `trg_graph` are the image of the node
+        at `iloc` position `i` in `src_graph`. Both arrays are contiguous and of
+        dtype `int32`, unless the graphs or the mapping are too large for it.
+
         Args:
             src_graph (GeoGraph): Domain of the node map (keys in `mapping` correspond
                 to indices from the `src_graph`).
             trg_graph (GeoGraph): Image of the node map (values in `mapping` correspond
                 to indices from the `trg_graph`)
-            mapping (Dict[int, List[int]], optional): A lookup table for the map which
-                maps nodes form `src_graph` to `trg_graph`.
+            mapping (Union[Dict[int, List[int]], Tuple[np.ndarray, np.ndarray]]): A
+                lookup table for the map which maps nodes form `src_graph` to
+                `trg_graph`. Either a dictionary mapping node indices of `src_graph`
+                to lists of node indices of `trg_graph`, or a tuple of CSR arrays
+                `(indptr, indices)` which use `iloc` positions.
         """
         self._src_graph = src_graph
         self._trg_graph = trg_graph
-        self._mapping = mapping
+        self._mapping: Optional[Dict[int, List[int]]] = None
+        self._inverse: Optional[NodeMap] = None
+
+        if isinstance(mapping, dict):
+            indptr, indices = self._dict_to_csr(mapping)
+        else:
+            indptr, indices = mapping
+        dtype = _csr_dtype(len(src_graph.df), len(trg_graph.df), len(indices))
+        self._indptr = np.ascontiguousarray(indptr, dtype=dtype)
+        self._indices = np.ascontiguousarray(indices, dtype=dtype)
+
+    @classmethod
+    def from_pairs(
+        cls,
+        src_graph: geograph.GeoGraph,
+        trg_graph: geograph.GeoGraph,
+        src_ids: np.ndarray,
+        trg_ids: np.ndarray,
+    ) -> NodeMap:
+        """
+        Create a NodeMap from the pairs of identified nodes.
+
+        The pairs must be sorted by `src_ids` and then by `trg_ids`, as returned by
+        `gpd_utils.identify_pairs`. This keeps the order of the target nodes of each
+        source node deterministic, which equality and `mapping` rely on.
+
+        Args:
+            src_graph (GeoGraph): Domain of the node map.
+            trg_graph (GeoGraph): Image of the node map.
+            src_ids (np.ndarray): Sorted `iloc` positions of the nodes in
+                `src_graph`.
+            trg_ids (np.ndarray): `iloc` positions of the nodes in `trg_graph` that
+                the nodes at `src_ids` map to, sorted for each source node.
+
+        Returns:
+            NodeMap: The NodeMap from `src_graph` to `trg_graph`.
+        """
+        # The pairs are sorted, so they are already in CSR order
+        indptr = np.concatenate(
+            ([0], np.cumsum(np.bincount(src_ids, minlength=len(src_graph.df))))
+        )
+        return cls(src_graph=src_graph, trg_graph=trg_graph, mapping=(indptr, trg_ids))
+
+    @classmethod
+    def _from_inverse(
+        cls, inverse: NodeMap, mapping: Tuple[np.ndarray, np.ndarray]
+    ) -> NodeMap:
+        """
+        Create the inverse of the NodeMap `inverse` from its inverted CSR `mapping`.
+
+        The created NodeMap keeps `inverse` as its inverse, so that inverting it
+        again returns `inverse`.
+        """
+        node_map = cls(
+            src_graph=inverse.trg_graph, trg_graph=inverse.src_graph, mapping=mapping
+        )
+        node_map._inverse = inverse
+        return node_map
 
     @property
     def src_graph(self) -> geograph.GeoGraph:
@@ -53,11 +126,57 @@ class NodeMap:
         """Values in the mapping dict correspond to node indices in the `trg_graph`."""
         return self._trg_graph
 
+    @property
+    def indptr(self) -> np.ndarray:
+        """Row pointer array of the mapping in CSR format (`iloc` positions)."""
+        return self._indptr
+
+    @property
+    def indices(self) -> np.ndarray:
+        """Column index array of the mapping in CSR format (`iloc` positions)."""
+        return self._indices
+
     @property
     def mapping(self) -> Dict[int, List[int]]:
         """Look-up table connecting node indices from `src_graph` to `trg_graph`."""
+        if self._mapping is None:
+            trg_locs = np.split(
+                self.trg_graph.df.index.values[self._indices], self._indptr[1:-1]
+            )
+            self._mapping = {
+                src_node: locs.tolist()
+                for src_node, locs in zip(self.src_graph.df.index, trg_locs)
+            }
         return self._mapping
 
+    def _dict_to_csr(
+        self, mapping: Dict[int, List[int]]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Convert a dict-of-lists `mapping` of node indices to CSR arrays.
+
+        Raises:
+            ValueError: If `mapping` contains node indices that are not in
+                `src_graph` or `trg_graph`.
+        """
+        src_index = self.src_graph.df.index
+        unknown_src = [src_node for src_node in mapping if src_node not in src_index]
+        if unknown_src:
+            raise ValueError(
+                f"Nodes {unknown_src} of the mapping are not in the source graph."
+            )
+        trg_lists = [mapping.get(src_node, []) for src_node in src_index]
+        counts = np.fromiter(map(len, trg_lists), dtype=int, count=len(trg_lists))
+        indptr = np.concatenate(([0], np.cumsum(counts)))
+        trg_locs = [trg_node for trg_nodes in trg_lists for trg_node in trg_nodes]
+        indices = self.trg_graph.df.index.get_indexer(trg_locs)
+        if np.any(indices < 0):
+            unknown_trg = np.asarray(trg_locs)[indices < 0].tolist()
+            raise ValueError(
+                f"Nodes {unknown_trg} of the mapping are not in the target graph."
+            )
+        return indptr, indices
+
     def __invert__(self) -> NodeMap:
         """Compute the inverse NodeMap."""
         return self.invert()
@@ -66,30 +185,113 @@ class NodeMap:
         """Check two NodeMaps for equality."""
         if not isinstance(other, NodeMap):
             return False
-        return (
-            self.src_graph == other.src_graph
-            and self.trg_graph == other.trg_graph
-            and self.mapping == other.mapping
+        if self is other:
+            return True
+        same_graphs = (
+            self.src_graph is other.src_graph and self.trg_graph is other.trg_graph
         )
+        if not same_graphs and not (
+            self.src_graph == other.src_graph and self.trg_graph == other.trg_graph
+        ):
+            return False
+        # The CSR arrays use `iloc` positions, so they can only be compared directly
+        # if both maps index the nodes in the same order
+        if same_graphs or (
+            self.src_graph.df.index.equals(other.src_graph.df.index)
+            and self.trg_graph.df.index.equals(other.trg_graph.df.index)
+        ):
+            return np.array_equal(self._indptr, other.indptr) and np.array_equal(
+                self._indices, other.indices
+            )
+        return self.mapping == other.mapping
 
     def invert(self) -> NodeMap:
-        """Compute the inverse NodeMap from `trg_graph` to `src_graph`."""
-        inverted_mapping: Dict = {index: [] for index in self.trg_graph.df.index}
+        """
+        Compute the inverse NodeMap from `trg_graph` to `src_graph`.
 
-        for src_node in self.src_graph.df.index:
-            for trg_node in self.mapping[src_node]:
-                inverted_mapping[trg_node].append(src_node)
+        The inverse is computed once and shared: inverting it again returns this
+        NodeMap.
+        """
+        if self._inverse is None:
+            inverted_indptr, inverted_indices = _invert_csr(
+                self._indptr, self._indices, len(self.trg_graph.df)
+            )
+            self._inverse = self._from_inverse(
+                self, mapping=(inverted_indptr, inverted_indices)
+            )
+
+        return self._inverse
+
+
+def _csr_dtype(*sizes: int) -> np.dtype:
+    """Return the smallest signed integer dtype of CSR arrays with the given sizes."""
+    if max(sizes, default=0) < np.iinfo(np.int32).max:
+        return np.dtype(np.int32)
+    return np.dtype(np.int64)
 
-        return NodeMap(
-            src_graph=self.trg_graph, trg_graph=self.src_graph, mapping=inverted_mapping
-        )
+
+def _invert_csr_numpy(
+    indptr: np.ndarray, indices: np.ndarray, n_trg: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Invert a one-to-many mapping given as CSR arrays.
+
+    Args:
+        indptr (np.ndarray): Row pointer array of the mapping.
+        indices (np.ndarray): Column index array of the mapping.
+        n_trg (int): Number of nodes in the image of the mapping.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The `(indptr, indices)` arrays of the inverted
+            mapping. The source nodes of each target node are in ascending order.
+    """
+    # A stable sort by target node keeps the source nodes of each target node
+    # in ascending order.
+    order = np.argsort(indices, kind="stable")
+    src_positions = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    inverted_indices = src_positions[order]
+    inverted_indptr = np.concatenate(
+        ([0], np.cumsum(np.bincount(indices, minlength=n_trg)))
+    )
+    return inverted_indptr, inverted_indices
+
+
+def _invert_csr_loop(
+    indptr: np.ndarray, indices: np.ndarray, n_trg: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Invert a one-to-many mapping given as CSR arrays with a counting sort.
+
+    Same as `_invert_csr_numpy`, but runs in linear time. Only fast when compiled
+    with numba.
+    """
+    counts = np.zeros(n_trg + 1, dtype=indptr.dtype)
+    for trg_node in indices:
+        counts[trg_node + 1] += 1
+    inverted_indptr = np.cumsum(counts)
+    # Next free slot in `inverted_indices` for each target node
+    offsets = inverted_indptr[:-1].copy()
+    inverted_indices = np.empty(len(indices), dtype=indices.dtype)
+    for src_node in range(len(indptr) - 1):
+        for k in range(indptr[src_node], indptr[src_node + 1]):
+            trg_node = indices[k]
+            inverted_indices[offsets[trg_node]] = src_node
+            offsets[trg_node] += 1
+    return inverted_indptr, inverted_indices
+
+
+# Use the compiled counting sort if numba is available
+if numba is not None:
+    _invert_csr = numba.njit(cache=True)(_invert_csr_loop)
+else:
+    _invert_csr = _invert_csr_numpy
 
 
 def identify_node(
     node: dict, other_graph: geograph.GeoGraph, mode: str = "corner"
-) -> List[int]:
+) -> np.ndarray:
     """
-    Return list of all node ids in `other_graph` which identify with the given `node`.
+    Return array of all node ids in `other_graph` which identify with the given `node`.
 
     Args:
         node (dict): The node for which to find nodes in `other_graphs` that can be
@@ -108,13 +310,21 @@ def identify_node(
               identified with each other. Touching corners or edges are not counted.
 
     Returns:
-        List[int]: List of node ids in `other_graph` which identify with `node`.
+        np.ndarray: Array of node ids in `other_graph` which identify with `node`.
     """
-    return gpd_utils.identify_node(node, other_graph.df, mode=mode)
+    return gpd_utils.identify_node(
+        node, other_graph.df, mode=mode, rtrees=other_graph.rtree_by_class
+    )
 
 
 def identify_graphs(
-    graph1: geograph.GeoGraph, graph2: geograph.GeoGraph, mode: str
+    graph1: geograph.GeoGraph,
+    graph2: geograph.GeoGraph,
+    mode: str,
+    *,
+    n_jobs: int = 1,
+    deduplicate: bool = False,
+    signatures: Optional[Tuple[np.ndarray, np.ndarray]] = None,
 ) -> NodeMap:
     """
     Idenitfy all nodes from `graph1` with nodes from `graph2` based on the given `mode`.
@@ -132,13 +342,42 @@ def identify_graphs(
               edges will be identified with each other.
             - interior: Polygons of the same `class_label` which overlap will be
               identified with each other. Touching corners or edges are not counted.
+        n_jobs (int, optional): Number of threads to use, -1 means one per CPU.
+            Defaults to 1.
+        deduplicate (bool, optional): Whether to identify nodes of `graph1` with the
+            same class label and geometry only once. Defaults to False.
+        signatures (Tuple[np.ndarray, np.ndarray], optional): The
+            `gpd_utils.geometry_signatures` of the dataframes of `graph1` and
+            `graph2`. If given, nodes which are unchanged between both graphs are
+            identified via the edges of `graph2` instead of a spatial query, see
+            `gpd_utils.identify_pairs_incremental`. This pays off if most nodes are
+            unchanged. `deduplicate` is ignored in this case. Defaults to None.
 
     Returns:
         NodeMap: A NodeMap containing the map from `graph1` to `graph2`.
     """
-    mapping = gpd_utils.identify_dfs(graph1.df, graph2.df, mode=mode)
+    if signatures is not None:
+        src_ids, trg_ids = gpd_utils.identify_pairs_incremental(
+            graph1.df,
+            graph2.df,
+            mode=mode,
+            trg_adjacency=graph2.adjacency,
+            signatures1=signatures[0],
+            signatures2=signatures[1],
+            rtrees=graph2.rtree_by_class,
+            n_jobs=n_jobs,
+        )
+    else:
+        src_ids, trg_ids = gpd_utils.identify_pairs(
+            graph1.df,
+            graph2.df,
+            mode=mode,
+            rtrees=graph2.rtree_by_class,
+            n_jobs=n_jobs,
+            deduplicate=deduplicate,
+        )
 
-    return NodeMap(src_graph=graph1, trg_graph=graph2, mapping=mapping)
+    return NodeMap.from_pairs(graph1, graph2, src_ids, trg_ids)
 
 
 def graph_polygon_diff(node_map: NodeMap) -> Tuple[gpd.GeoDataFrame, gpd.GeoDataFrame]:
@@ -156,12 +395,30 @@ def graph_polygon_diff(node_map: NodeMap) -> Tuple[gpd.GeoDataFrame, gpd.GeoData
         node_map.src_graph.crs == node_map.trg_graph.crs
     ), "CRS systems of graphs do not agree."
 
-    trg_minus_src = []
-    src_minus_trg = []
-    for index in node_map.src_graph.df.index:
-        added_part, removed_part = node_polygon_diff(index, node_map)
-        trg_minus_src.append(added_part)
-        src_minus_trg.append(removed_part)
+    # Work on `iloc` positions of the CSR arrays, so that no pandas index lookups
+    # are needed per node
+    src_polygons = np.asarray(node_map.src_graph.df.geometry.values)
+    trg_polygons = np.asarray(node_map.trg_graph.df.geometry.values)
+    indptr, indices = node_map.indptr, node_map.indices
+    has_image = np.diff(indptr) > 0
+    image_polygons = np.array(
+        [
+            shapely.union_all(trg_polygons[indices[indptr[i] : indptr[i + 1]]])
+            for i in np.flatnonzero(has_image)
+        ],
+        dtype=object,
+    )
+
+    trg_minus_src = np.full(len(src_polygons), EMPTY_POLYGON, dtype=object)
+    src_minus_trg = src_polygons.copy()
+    trg_minus_src[has_image] = shapely.difference(
+        image_polygons, src_polygons[has_image]
+    )
+    src_minus_trg[has_image] = shapely.difference(
+        src_polygons[has_image], image_polygons
+    )
+    trg_minus_src = [collapse_empty_polygon(polygon) for polygon in trg_minus_src]
+    src_minus_trg = [collapse_empty_polygon(polygon) for polygon in src_minus_trg]
 
     trg_minus_src = gpd.GeoDataFrame(
         index=node_map.src_graph.df.index,
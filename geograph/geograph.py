@@ -11,9 +11,17 @@ import inspect
 import os
 import pathlib
 import pickle
-from copy import deepcopy
-from itertools import zip_longest
-from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 import geopandas as gpd
 import networkx as nx
@@ -21,13 +29,19 @@ import numpy as np
 import pandas as pd
 import pyproj
 import rasterio
+import scipy.sparse
 import shapely
-from shapely.prepared import prep
+from scipy.sparse.csgraph import connected_components
 from tqdm import tqdm
 
 from geograph import binary_graph_operations, metrics
 from geograph.metrics import CLASS_METRICS_DICT, Metric
-from geograph.utils import rasterio_utils
+from geograph.utils import geopandas_utils, rasterio_utils
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 pd.options.mode.chained_assignment = None  # default='warn'
 
@@ -36,6 +50,8 @@ VALID_EXTENSIONS = (
     ".pkl",
     ".gz",
     ".bz2",
+    ".zst",
+    ".parquet",
     ".shp",
     ".gpkg",
     ".tiff",
@@ -45,9 +61,158 @@ VALID_EXTENSIONS = (
 )
 
 
+# Suffixes of (compressed) pickle files that graphs can be saved to and loaded from
+PICKLE_EXTENSIONS = (".pickle", ".pkl", ".gz", ".bz2", ".zst")
+
+
+def _load_pickle(load_path: pathlib.Path) -> Any:
+    """Load a pickle file, decompressing it according to the suffix of `load_path`."""
+    if load_path.suffix == ".bz2":
+        with bz2.BZ2File(load_path, "rb") as bz2_file:
+            return pickle.load(bz2_file)
+    if load_path.suffix == ".gz":
+        with gzip.GzipFile(load_path, "rb") as gz_file:
+            return pickle.loads(gz_file.read())
+    if load_path.suffix == ".zst":
+        _check_zstandard()
+        with open(load_path, "rb") as file:
+            return pickle.loads(zstandard.ZstdDecompressor().decompress(file.read()))
+    with open(load_path, "rb") as file:
+        return pickle.load(file)
+
+
+def _save_pickle(
+    data: Any, save_path: pathlib.Path, protocol: int = pickle.DEFAULT_PROTOCOL
+) -> None:
+    """Save `data` to a pickle file, compressed according to `save_path`'s suffix."""
+    if save_path.suffix == ".bz2":
+        with bz2.BZ2File(save_path, "wb") as bz2_file:
+            pickle.dump(data, bz2_file, protocol=protocol)
+    elif save_path.suffix == ".gz":
+        with gzip.GzipFile(save_path, "wb") as gz_file:
+            gz_file.write(pickle.dumps(data, protocol=protocol))
+    elif save_path.suffix == ".zst":
+        _check_zstandard()
+        with open(save_path, "wb") as file:
+            file.write(
+                zstandard.ZstdCompressor(level=3).compress(
+                    pickle.dumps(data, protocol=protocol)
+                )
+            )
+    else:
+        with open(save_path, "wb") as file:
+            pickle.dump(data, file, protocol=protocol)
+    save_path.chmod(0o664)
+
+
+def _check_zstandard() -> None:
+    """Raise an ImportError if the optional `zstandard` package is missing."""
+    if zstandard is None:
+        raise ImportError(
+            "Saving and loading `.zst` files requires the `zstandard` package."
+        )
+
+
+def _edges_path(graph_path: pathlib.Path) -> pathlib.Path:
+    """Return path of the edge array that belongs to a graph saved as parquet."""
+    return graph_path.with_suffix(".edges.npy")
+
+
+def _edges_to_csr(
+    src: np.ndarray, trg: np.ndarray, n_nodes: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convert the edges of an undirected graph to CSR adjacency arrays.
+
+    Args:
+        src (np.ndarray): `iloc` positions of the first node of each edge.
+        trg (np.ndarray): `iloc` positions of the second node of each edge.
+        n_nodes (int): Number of nodes in the graph.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The `(indptr, indices)` arrays of the
+            adjacency. Each edge is contained in both directions, and self loops and
+            duplicate edges are removed. The neighbours of each node are sorted.
+    """
+    src, trg = np.concatenate((src, trg)), np.concatenate((trg, src))
+    is_edge = src != trg
+    keys = np.unique(src[is_edge].astype(np.int64) * n_nodes + trg[is_edge])
+    src, indices = np.divmod(keys, n_nodes)
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(src, minlength=n_nodes))))
+    return indptr, indices
+
+
+def _csr_to_edges(
+    indptr: np.ndarray, indices: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convert CSR adjacency arrays as returned by `_edges_to_csr` back to edges.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: `iloc` positions of the first and second
+            node of each edge. Every edge is only contained in one direction.
+    """
+    src = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    is_first = src < indices
+    return src[is_first], indices[is_first]
+
+
+def _polygon_attributes(geom: np.ndarray) -> List[Dict[str, Any]]:
+    """
+    Return the node attributes describing each polygon in `geom`.
+
+    The attributes are computed with one vectorised shapely call per attribute
+    over all polygons.
+
+    Args:
+        geom (np.ndarray): Array of polygons.
+
+    Returns:
+        List[Dict[str, Any]]: The `rep_point`, `area`, `perimeter` and `bounds`
+            of each polygon.
+    """
+    rep_points = shapely.point_on_surface(geom).tolist()
+    areas = shapely.area(geom).tolist()
+    perimeters = shapely.length(geom).tolist()
+    bounds = list(map(tuple, shapely.bounds(geom).tolist()))
+    return [
+        {
+            "rep_point": rep_points[i],
+            "area": areas[i],
+            "perimeter": perimeters[i],
+            "bounds": bounds[i],
+        }
+        for i in range(len(geom))
+    ]
+
+
+def _add_nodes_from_dataframe(graph: nx.Graph, df: gpd.GeoDataFrame) -> None:
+    """
+    Add each polygon in `df` as a node to `graph` with useful attributes.
+
+    The node ids are the index of `df`. The node attributes are computed for
+    all polygons at once.
+
+    Args:
+        graph (nx.Graph): The graph to add the nodes to.
+        df (gpd.GeoDataFrame): GeoDataFrame containing polygon objects.
+    """
+    attributes = _polygon_attributes(df["geometry"].values)
+    class_labels = df["class_label"].tolist()
+    graph.add_nodes_from(
+        (index, {**attributes[i], "class_label": class_labels[i]})
+        for i, index in enumerate(df.index.tolist())
+    )
+
+
 class GeoGraph:
     """Class for the fragmentation graph."""
 
+    # The graph is either stored as networkx graph or as CSR adjacency arrays, see
+    # the `graph` and `adjacency` properties
+    _graph: Optional[nx.Graph] = None
+    _adjacency: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
     def __init__(
         self,
         data,
@@ -61,8 +226,8 @@ class GeoGraph:
         """
         Class for the fragmentation graph.
 
-        This class can load a pickled networkx graph directly, or create the
-        graph from
+        This class can load a pickled networkx graph or a graph saved in parquet
+        format directly, or create the graph from
             - a path to vector data (.shp, .gpkg)
             - a path to raster data  (.tif, .tiff, .geotif, .geotiff)
             - a numpy array containing raster data
@@ -79,18 +244,18 @@ class GeoGraph:
         https://docs.python.org/3/library/pickle.html
 
         Args:
-            data: Can be a path to a pickle file or compressed pickle file to load
-                the graph from, a path to vector data in GPKG or Shapefile format,
-                a path to raster data in GeoTiff format, a numpy array containing raster
-                data, or a dataframe containing polygons.
+            data: Can be a path to a pickle file, compressed pickle file or parquet
+                file to load the graph from, a path to vector data in GPKG or
+                Shapefile format, a path to raster data in GeoTiff format, a numpy
+                array containing raster data, or a dataframe containing polygons.
             crs (str): Coordinate reference system to set on the resulting
                 dataframe. Warning: whatever units of distance the CRS uses will be
                 the units of distance for all polygon calculations, including for
                 the `tolerance` argument. Using a lat-long CRS can therefore result
                 in incoherent output.
             graph_save_path (str or pathlib.Path, optional): A path to a pickle
-                file to save the graph to, can be `.gz` or `.bz2`. Defaults to None,
-                which will not save the graph.
+                file to save the graph to, can be `.gz`, `.bz2` or `.zst`, or to a
+                parquet file. Defaults to None, which will not save the graph.
             raster_save_path (str or pathlib.Path, optional): A path to a file
                 to save the polygonised raster data in. A path to a GPKG file is
                 recommended, but Shapefiles also work. Defaults to None, which will
@@ -110,9 +275,19 @@ class GeoGraph:
             **apply_buffer (bool, optional): Apply shapely buffer function to
                 the polygons after polygonising. This can fix issues with the
                 polygonisation creating invalid geometries.
+            **tile_size (int, optional): Polygonise large rasters in square tiles
+                of `tile_size` pixels. Defaults to None, which polygonises the
+                whole raster at once.
+            **n_jobs (int, optional): Number of processes to polygonise the
+                tiles with, -1 means one per CPU. Defaults to 1.
         """
         super().__init__()
-        self.graph = nx.Graph()
+        # Data derived from the dataframe or the graph, each cached together with
+        # the object it was derived from, see `_invalidate_caches`
+        self._rtree_by_class: Tuple[Optional[gpd.GeoDataFrame], Any] = (None, None)
+        self._patch_areas: Tuple[Optional[gpd.GeoDataFrame], Any] = (None, None)
+        self._graph_adjacency: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._component_labels: Tuple[Optional[Tuple], Any] = (None, None)
         self.habitats: Dict[str, HabitatGeoGraph] = {}
         self._crs: Optional[Union[str, pyproj.CRS]] = crs
         self._columns_to_rename: Optional[Dict[str, str]] = columns_to_rename
@@ -132,7 +307,7 @@ class GeoGraph:
             load_path = pathlib.Path(data)
             assert load_path.exists()
             # Load from saved graph
-            if load_path.suffix in (".pickle", ".pkl", ".gz", ".bz2"):
+            if load_path.suffix in PICKLE_EXTENSIONS + (".parquet",):
                 self.df = self._load_from_graph_path(load_path)
                 load_from_graph = True
             # Load from saved vector data
@@ -171,8 +346,8 @@ class GeoGraph:
         self.components = self.get_graph_components(calc_polygons=False)
 
         print(
-            f"Graph successfully loaded with {self.graph.number_of_nodes()} nodes",
-            f"and {self.graph.number_of_edges()} edges.",
+            f"Graph successfully loaded with {len(self.df)} nodes",
+            f"and {self.number_of_edges()} edges.",
         )
 
     def __eq__(self, o: object) -> bool:
@@ -180,11 +355,154 @@ class GeoGraph:
             return False
         return nx.fast_could_be_isomorphic(self.graph, o.graph)
 
+    @property
+    def graph(self) -> nx.Graph:
+        """Return the networkx graph of the polygons.
+
+        Graphs loaded from polygon data are stored as CSR adjacency arrays (see
+        `adjacency`), and the networkx graph is only built on first access. From
+        then on, the networkx graph is the primary store and may be modified.
+        """
+        if self._graph is None:
+            self._graph = self._build_graph()
+            self._adjacency = None
+        return self._graph
+
+    @graph.setter
+    def graph(self, graph: nx.Graph) -> None:
+        self._graph = graph
+        self._adjacency = None
+        self._graph_adjacency = None
+
+    def _build_graph(self) -> nx.Graph:
+        """Build the networkx graph from the dataframe and the adjacency arrays."""
+        graph = nx.Graph()
+        _add_nodes_from_dataframe(graph, self.df)
+        if self._adjacency is not None:
+            src, trg = _csr_to_edges(*self._adjacency)
+            node_ids = self.df.index.values
+            graph.add_edges_from(zip(node_ids[src].tolist(), node_ids[trg].tolist()))
+        return graph
+
+    @property
+    def adjacency(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the adjacency of the graph as CSR arrays `(indptr, indices)`.
+
+        The nodes adjacent to the node at `iloc` position `i` in the dataframe are
+        at the `iloc` positions `indices[indptr[i]:indptr[i+1]]`.
+
+        Once the networkx graph is the primary store, the arrays are derived from it
+        and cached until the graph is changed by the GeoGraph methods (e.g.
+        `merge_nodes`). Code that modifies `graph` directly must assign it again via
+        `self.graph = graph`, or call `_invalidate_caches()`, to reset the cache.
+        """
+        if self._graph is None and self._adjacency is not None:
+            return self._adjacency
+        if self._graph_adjacency is None:
+            node_index = self._node_index
+            edges = np.array(list(self.graph.edges)).reshape(-1, 2)
+            positions = node_index.get_indexer(edges.ravel()).reshape(-1, 2)
+            if (positions < 0).any():
+                raise ValueError("`graph` contains edges of nodes not in `df`.")
+            self._graph_adjacency = _edges_to_csr(
+                positions[:, 0], positions[:, 1], len(node_index)
+            )
+        return self._graph_adjacency
+
+    @property
+    def _node_index(self) -> pd.Index:
+        """Return the node ids in the order of the `iloc` positions of `adjacency`."""
+        return self.df.index
+
+    @property
+    def component_labels(self) -> Tuple[int, np.ndarray]:
+        """Return the connected components of the graph as labels of its nodes.
+
+        The components are labelled once on the `adjacency` arrays, and cached until
+        the adjacency changes. They are shared by `get_graph_components` and the
+        component metrics.
+
+        Returns:
+            Tuple[int, np.ndarray]: The number of components, and the component
+                label of the node at each `iloc` position in the dataframe.
+        """
+        adjacency = self.adjacency
+        cached_adjacency, labels = self._component_labels
+        if cached_adjacency is not adjacency:
+            indptr, indices = adjacency
+            adjacency_matrix = scipy.sparse.csr_matrix(
+                (np.ones(len(indices), dtype=bool), indices, indptr),
+                shape=(len(indptr) - 1, len(indptr) - 1),
+            )
+            labels = connected_components(adjacency_matrix, directed=False)
+            self._component_labels = (adjacency, labels)
+        return labels
+
+    def neighbors(self, position: int) -> np.ndarray:
+        """Return the `iloc` positions of the neighbours of a node.
+
+        Args:
+            position (int): The `iloc` position of the node in the dataframe.
+
+        Returns:
+            np.ndarray: The `iloc` positions of the adjacent nodes, see `adjacency`.
+        """
+        indptr, indices = self.adjacency
+        return indices[indptr[position] : indptr[position + 1]]
+
+    def number_of_nodes(self) -> int:
+        """Return the number of nodes of the graph."""
+        return len(self._node_index)
+
+    def number_of_edges(self) -> int:
+        """Return the number of edges of the graph."""
+        return len(self.adjacency[1]) // 2
+
     @property
     def rtree(self):
-        """Return Rtree object."""
+        """Return the spatial index of the dataframe.
+
+        This is a `shapely.STRtree` which is bulk loaded with Sort-Tile-Recursive
+        packing from all node geometries at once. It is built lazily and cached
+        by geopandas until the dataframe changes.
+        """
         return self.df.sindex
 
+    @property
+    def rtree_by_class(self) -> geopandas_utils.ClassRtrees:
+        """Return one spatial index per class label of the dataframe.
+
+        See `geopandas_utils.class_rtrees`. The spatial indices are cached until
+        the dataframe changes.
+        """
+        cached_df, rtrees = self._rtree_by_class
+        if cached_df is not self.df:
+            rtrees = geopandas_utils.class_rtrees(self.df)
+            self._rtree_by_class = (self.df, rtrees)
+        return rtrees
+
+    @property
+    def patch_areas(self) -> np.ndarray:
+        """Return the area of each patch, shared by the area based metrics.
+
+        The areas are cached until the dataframe changes.
+        """
+        cached_df, areas = self._patch_areas
+        if cached_df is not self.df:
+            areas = self.df.area.values
+            self._patch_areas = (self.df, areas)
+        return areas
+
+    def _invalidate_caches(self) -> None:
+        """Reset the data cached from the dataframe and the graph.
+
+        This must be called after modifying either of them in place.
+        """
+        self._rtree_by_class = (None, None)
+        self._patch_areas = (None, None)
+        self._graph_adjacency = None
+        self._component_labels = (None, None)
+
     @property
     def crs(self):
         """Return crs of dataframe."""
@@ -303,25 +621,28 @@ class GeoGraph:
 
     def _load_from_graph_path(self, graph_path: pathlib.Path) -> gpd.GeoDataFrame:
         """
-        Load networkx graph and dataframe objects from a pickle file.
+        Load networkx graph and dataframe objects from a pickle or parquet file.
 
         Args:
             graph_path (pathlib.Path): Path to a pickle file. Can be compressed
-                with gzip or bz2.
+                with gzip, bz2 or zstandard. Alternatively, a path to a parquet file
+                saved with `save_graph`, with the edges in a `.edges.npy` file next to
+                it.
 
         Returns:
             gpd.GeoDataFrame: The dataframe containing polygon objects.
         """
-        if graph_path.suffix == ".bz2":
-            with bz2.BZ2File(graph_path, "rb") as bz2_file:
-                data = pickle.load(bz2_file)
-        elif graph_path.suffix == ".gz":
-            with gzip.GzipFile(graph_path, "rb") as gz_file:
-                data = pickle.loads(gz_file.read())
-        else:
-            with open(graph_path, "rb") as file:
-                data = pickle.load(file)
-
+        if graph_path.suffix == ".parquet":
+            df = gpd.read_parquet(graph_path)
+            edges = df.index.get_indexer(np.load(_edges_path(graph_path)).ravel())
+            if (edges < 0).any():
+                raise ValueError(
+                    f"The edges in {_edges_path(graph_path)} contain nodes which are "
+                    f"not in the dataframe in {graph_path}."
+                )
+            self._adjacency = _edges_to_csr(edges[0::2], edges[1::2], len(df))
+            return df
+        data = _load_pickle(graph_path)
         self.graph = data["graph"]
         return data["dataframe"]
 
@@ -334,43 +655,57 @@ class GeoGraph:
         """
         Save graph with attributes and dataframe as pickle file. Can be compressed.
 
+        Alternatively, the graph can be saved in parquet format by passing a filename
+        ending in `parquet`. This writes the dataframe with its geometries in WKB
+        format to `save_path`, and the edges as an array of node id pairs to a
+        `.edges.npy` file next to it. The node attributes are recomputed from the
+        dataframe on loading. Saving and loading parquet files requires `pyarrow`.
+
         Args:
             save_path (Union[pathlib.Path, str]): Path to a pickle file. Can be
-                compressed with gzip or bz2 by passing filenames ending in `gz` or
-                `bz2`.
-            overwrite (bool, optional): If True, an existing file at `save_path`
-                will be overwritten. Else throws an error. Defaults to False.
+                compressed with gzip, bz2 or zstandard by passing filenames ending in
+                `gz`, `bz2` or `zst`, or saved in parquet format by passing a filename
+                ending in `parquet`. Zstandard is much faster than the other
+                compressions and requires the `zstandard` package.
+            overwrite (bool, optional): If True, an existing file at `save_path`,
+                or its `.edges.npy` file, will be overwritten. Else throws an error.
+                Defaults to False.
             pickle_protocol (int, optional): Selects the pickle protocol that is used
                 for python object serealisation. Supported protocols are explained here:
                 https://docs.python.org/3/library/pickle.html#data-stream-format
                 Defaults to pickle.DEFAULT_PROTOCOL (4 in python 3.8).
 
         Raises:
-            ValueError: If `save_path` is not a pickle, gz, or bz2 file.
+            ValueError: If `save_path` is not a pickle, gz, bz2, zst or parquet file.
         """
         save_path = pathlib.Path(save_path)
-        if not overwrite and save_path.exists():
-            raise UserWarning(
-                f"A file already exists at {save_path}. To overwrite, ",
-                "set the `overwrite` flag to True.",
-            )
+        paths = [save_path]
+        if save_path.suffix == ".parquet":
+            paths.append(_edges_path(save_path))
+        for path in paths:
+            if not overwrite and path.exists():
+                raise UserWarning(
+                    f"A file already exists at {path}. To overwrite, ",
+                    "set the `overwrite` flag to True.",
+                )
 
-        if save_path.suffix not in (".pickle", ".pkl", ".gz", ".bz2"):
+        if save_path.suffix not in PICKLE_EXTENSIONS + (".parquet",):
             raise ValueError(
-                "Argument `save_path` should end in `.pickle`, `.pkl`, `.gz` or `.bz2` "
-                "to indicate a pickle file or compressed pickle file."
+                "Argument `save_path` should end in `.pickle`, `.pkl`, `.gz`, `.bz2` "
+                "or `.zst` to indicate a pickle file or compressed pickle file, or in "
+                "`.parquet` to indicate a parquet file."
             )
+        if save_path.suffix == ".parquet":
+            self.df.to_parquet(save_path)
+            src, trg = _csr_to_edges(*self.adjacency)
+            node_ids = self.df.index.values
+            edges = np.stack((node_ids[src], node_ids[trg]))
+            np.save(_edges_path(save_path), edges.T.astype(np.int64))
+            save_path.chmod(0o664)
+            _edges_path(save_path).chmod(0o664)
+            return
         data = {"graph": self.graph, "dataframe": self.df}
-        if save_path.suffix == ".bz2":
-            with bz2.BZ2File(save_path, "wb") as bz2_file:
-                pickle.dump(data, bz2_file, protocol=pickle_protocol)
-        elif save_path.suffix == ".gz":
-            with gzip.GzipFile(save_path, "wb") as gz_file:
-                gz_file.write(pickle.dumps(data, protocol=pickle_protocol))
-        else:
-            with open(save_path, "wb") as file:
-                pickle.dump(data, file, protocol=pickle_protocol)
-        save_path.chmod(0o664)
+        _save_pickle(data, save_path, protocol=pickle_protocol)
 
     def _load_from_dataframe(
         self,
@@ -412,48 +747,24 @@ class GeoGraph:
 
         # Reset index to ensure consistent indices
         df = df.reset_index(drop=True)
-        # Using this list and iterating through it is slightly faster than
-        # iterating through df due to the dataframe overhead
-        geom: List[shapely.Polygon] = df["geometry"].tolist()
-        # this dict maps polygon row numbers in df to a list
-        # of neighbouring polygon row numbers
-        graph_dict = {}
 
+        # Find all pairs of neighbouring polygons with a single bulk query, which
+        # returns the row numbers of the polygons in df
         if tolerance > 0:
-            # Expand the borders of the polygons by `tolerance```
-            new_polygons: List[shapely.Polygon] = (
-                df["geometry"].buffer(tolerance).tolist()
+            # Select the polygons at most `tolerance` apart directly with a distance
+            # predicate, which is exact and much cheaper than intersecting polygons
+            # whose borders were expanded by `tolerance`
+            geom = df["geometry"].values
+            polygon_ids, neighbour_ids = shapely.STRtree(geom).query(
+                geom, predicate="dwithin", distance=tolerance
             )
-        # Creating nodes (=vertices) and finding neighbors
-        for index, polygon in tqdm(
-            enumerate(geom),
-            desc="Step 1 of 2: Creating nodes and finding neighbours",
-            total=len(geom),
-        ):
-            if tolerance > 0:
-                # find the indexes of all polygons which intersect with this one
-                neighbours = df.sindex.query(
-                    new_polygons[index], predicate="intersects"
-                )
-            else:
-                neighbours = df.sindex.query(polygon, predicate="intersects")
-
-            graph_dict[index] = neighbours
-            # add each polygon as a node to the graph with useful attributes
-            self.graph.add_node(
-                index,
-                rep_point=polygon.representative_point(),
-                area=polygon.area,
-                perimeter=polygon.length,
-                bounds=polygon.bounds,
+        else:
+            polygon_ids, neighbour_ids = df.sindex.query(
+                df["geometry"].values, predicate="intersects"
             )
-        # iterate through the dict and add edges between neighbouring polygons
-        for polygon_id, neighbours in tqdm(
-            graph_dict.items(), desc="Step 2 of 2: Adding edges"
-        ):
-            for neighbour_id in neighbours:
-                if polygon_id != neighbour_id:
-                    self.graph.add_edge(polygon_id, neighbour_id)
+        # Store the edges as adjacency arrays, the networkx graph with the node
+        # attributes is only built when it is needed
+        self._adjacency = _edges_to_csr(polygon_ids, neighbour_ids, len(df))
 
         # add index name
         df.index.name = "node_index"
@@ -496,17 +807,32 @@ class GeoGraph:
         # nodes in node_list.
         adjacency_set = set()
         for node in node_list:
-            adjacency_set.update(list(self.graph.neighbors(node)))
-        adjacency_set -= adjacency_set.intersection(node_list)
+            adjacency_set.update(self.graph.neighbors(node))
+        adjacency_set.difference_update(node_list)
 
         # Build union polygon.
         polygon = self.df["geometry"].loc[node_list].unary_union
 
-        # Remove nodes from graph and rows from df
-        self._remove_nodes(node_list)
-        # Add final node to graph and df
+        # Remove nodes from graph and rows from df. If `final_index` is one of the
+        # merged nodes, its row is kept and overwritten in place instead.
+        self.graph.remove_nodes_from(node_list)
+        self.df = self.df.drop(
+            index=[node for node in node_list if node != final_index]
+        )
+        # Add final node to graph and df. Overwriting a row or appending a row
+        # after the last index keeps the index sorted, so sorting is only needed
+        # when inserting a new index in between.
+        requires_sorting = (
+            final_index not in self.df.index
+            and len(self.df) > 0
+            and final_index < self.df.last_valid_index()
+        )
         self._add_node(
-            final_index, adjacency_set, geometry=polygon, class_label=class_label
+            final_index,
+            adjacency_set,
+            requires_sorting=requires_sorting,
+            geometry=polygon,
+            class_label=class_label,
         )
 
     def merge_classes(
@@ -535,6 +861,7 @@ class GeoGraph:
         )
         # rename class labels
         self.df.loc[self.df["class_label"].isin(class_list), "class_label"] = new_name
+        self._invalidate_caches()
         merged_neighbours = set()
         while True:
             num_merges = 0
@@ -619,105 +946,111 @@ class GeoGraph:
             raise ValueError("`max_travel_distance` must be greater than 0.")
         if barrier_classes is None:
             barrier_classes = []
-        hgraph: nx.Graph = deepcopy(self.graph)
-        # Remove all edges in the graph, then at the end we only have edges
-        # between nodes less than `max_travel_distance` apart
-        hgraph.clear_edges()
-        # Get dict to convert between iloc indexes and loc indexes
-        # These are different only if nodes have been removed from the df
-        idx_dict: Dict[int, int] = dict(zip(range(len(self.df)), self.df.index.values))
-        # Get dicts of polygons and buff polygons to avoid repeatedly querying
-        # the dataframe. These dicts accept loc indexes
-        polygons: Dict[int, shapely.Polygon] = self.df["geometry"].to_dict()
+        # Get arrays of polygons and buff polygons to avoid repeatedly querying
+        # the dataframe. These arrays accept iloc indexes
+        geoms = np.asarray(self.df["geometry"].values)
         if max_travel_distance > 0:
             # Vectorised buffer on the entire df to calculate the expanded polygons
             # used to get intersections.
-            buff_polygons = self.df["geometry"].buffer(max_travel_distance).to_dict()
-        # Remove non-habitat nodes from habitat graph
-        # np.where is very fast here and gets the iloc based indexes
-        # Combining it with the set comprehension reduces time by an order of
-        # magnitude compared to `set(self.df.loc[])`
+            buff_geoms = np.asarray(
+                self.df["geometry"].buffer(max_travel_distance).values
+            )
+        else:
+            buff_geoms = geoms
+        # The habitat graph only contains the habitat nodes, with edges between
+        # nodes less than `max_travel_distance` apart
         valid_class_bool = np.isin(self.class_label, valid_classes)
-        invalid_idx = {idx_dict[i] for i in np.where(~valid_class_bool)[0]}
-        hgraph.remove_nodes_from(invalid_idx)
-        # get list of barrier node indices (iloc)
-        barrier_indices = set(np.where(np.isin(self.class_label, barrier_classes))[0])
-        for node in tqdm(
-            hgraph.nodes, desc="Generating habitat graph", total=len(hgraph)
-        ):
-            polygon = polygons[node]
-            repr_point = polygon.representative_point()
-            if max_travel_distance > 0:
-                buff_poly_bounds = buff_polygons[node].bounds
-                buff_poly = buff_polygons[node]
-            else:
-                buff_poly_bounds = polygon.bounds
-                buff_poly = polygon
-            if len(barrier_classes) == 0:
-                buff_poly = prep(buff_poly)
-            # Query rtree for all polygons within `max_travel_distance` of the original
-            nbrs = set(self.rtree.intersection(buff_poly_bounds))
-            barrier_nbrs = {idx_dict[nbr] for nbr in barrier_indices.intersection(nbrs)}
-            barriers_exist = len(barrier_nbrs) > 0
-            barrier_poly = self.df["geometry"].loc[barrier_nbrs].unary_union
-            # Necessary to correct for the rtree returning iloc indexes
-            nbrs = {idx_dict[nbr] for nbr in nbrs}
-            for nbr in nbrs:
-                # If a node is not a habitat class node or is a barrier class node,
-                # don't add the edge
-                if nbr == node or nbr in barrier_nbrs or nbr in invalid_idx:
+        barrier_class_bool = np.isin(self.class_label, barrier_classes)
+
+        # Query the spatial index once for all habitat polygons to get all pairs
+        # of polygons less than `max_travel_distance` apart (as iloc indexes)
+        habitat_idx = np.where(valid_class_bool)[0]
+        query_idx, nbr_idx = self.rtree.query(
+            buff_geoms[habitat_idx], predicate="intersects"
+        )
+        node_idx = habitat_idx[query_idx]
+        # If a neighbour is not a habitat class node or is a barrier class node,
+        # don't add the edge
+        is_edge = (
+            (node_idx != nbr_idx)
+            & valid_class_bool[nbr_idx]
+            & ~barrier_class_bool[nbr_idx]
+        )
+        node_idx, nbr_idx = node_idx[is_edge], nbr_idx[is_edge]
+
+        if len(barrier_classes) > 0:
+            add_edge = np.ones(len(node_idx), dtype=bool)
+            # Pairs are grouped by node, so each node's pairs are one slice
+            node_starts = np.flatnonzero(np.diff(node_idx, prepend=-1))
+            node_ends = np.append(node_starts[1:], len(node_idx))
+            for start, end in tqdm(
+                zip(node_starts, node_ends),
+                desc="Checking barriers",
+                total=len(node_starts),
+            ):
+                polygon = geoms[node_idx[start]]
+                buff_poly = buff_geoms[node_idx[start]]
+                # Query rtree for all polygons within `max_travel_distance` of the
+                # original, and keep the barrier polygons among them (iloc)
+                nbrs = self.rtree.query(buff_poly)
+                barrier_nbrs = nbrs[barrier_class_bool[nbrs]]
+                if len(barrier_nbrs) == 0:
                     continue
-                # Otherwise add the edge with distance attribute
-                nbr_polygon = polygons[nbr]
-                if not hgraph.has_edge(node, nbr) and buff_poly.intersects(nbr_polygon):
-                    add_edge = True
-                    if barriers_exist:
-                        # Here we loop through all barrier_nbrs and calculate the
-                        # set difference between the buffered polygon and the
-                        # barrier polygon. If this results in multiple polygons,
-                        # then the barrier polygon fully cuts the buffered polygon.
-                        #
-                        # We find the resulting buffered polygon fragment that contains 
-                        # the original node polygon, by selecting the polygon that 
-                        # contains a representative point sampled from the original 
-                        # polygon. 
-                        # We then check if that polygon fragment intersects the 
-                        # neighbour polygon we're trying to reach. 
-                        # If it does not, there is no path.
-                        # If it does, there may be a path or there may not - it
-                        # would require complex pathfinding code to discover, but
-                        # we add the edge anyway.
-                        #
-                        # Invalid geometries are common here and throw an error
-                        # for in the difference operation
-                        if not barrier_poly.is_valid:
-                            barrier_poly = barrier_poly.buffer(0)
-                        if not buff_poly.is_valid:
-                            buff_poly = buff_poly.buffer(0)
-                        if barrier_poly.is_valid and buff_poly.is_valid:
-                            # if buff poly and barrier poly do not intersect,
-                            # then diff will just return buff_poly.
-                            diff = buff_poly - barrier_poly
-                            if isinstance(diff, shapely.geometry.MultiPolygon):
-                                if len(diff) > 1:
-                                    bools = [poly.contains(repr_point) for poly in diff]
-                                    node_poly = diff[bools.index(True)]
-                                    if not node_poly.intersects(nbr_polygon):
-                                        add_edge = False
-                    if add_edge:
-                        if add_distance:
-                            if max_travel_distance == 0:
-                                dist = 0.0
-                            else:
-                                dist = polygon.distance(nbr_polygon)
-                            hgraph.add_edge(node, nbr, distance=dist)
-                        else:
-                            hgraph.add_edge(node, nbr)
+                barrier_poly = shapely.union_all(geoms[barrier_nbrs])
+                # Here we calculate the set difference between the buffered polygon
+                # and the barrier polygon. If this results in multiple polygons,
+                # then the barrier polygon fully cuts the buffered polygon.
+                #
+                # We find the resulting buffered polygon fragment that contains
+                # the original node polygon, by selecting the polygon that
+                # contains a representative point sampled from the original
+                # polygon.
+                # We then check if that polygon fragment intersects the
+                # neighbour polygons we're trying to reach.
+                # If it does not, there is no path.
+                # If it does, there may be a path or there may not - it
+                # would require complex pathfinding code to discover, but
+                # we add the edge anyway.
+                #
+                # Invalid geometries are common here and throw an error
+                # for in the difference operation
+                if not barrier_poly.is_valid:
+                    barrier_poly = barrier_poly.buffer(0)
+                if not buff_poly.is_valid:
+                    buff_poly = buff_poly.buffer(0)
+                if not (barrier_poly.is_valid and buff_poly.is_valid):
+                    continue
+                # if buff poly and barrier poly do not intersect,
+                # then diff will just return buff_poly.
+                diff = buff_poly - barrier_poly
+                if (
+                    isinstance(diff, shapely.geometry.MultiPolygon)
+                    and len(diff.geoms) > 1
+                ):
+                    repr_point = polygon.representative_point()
+                    node_polys = [
+                        poly for poly in diff.geoms if poly.contains(repr_point)
+                    ]
+                    # If the barrier covers the representative point, we cannot
+                    # tell which fragment the node is in, so we keep the edges
+                    if len(node_polys) > 0:
+                        add_edge[start:end] = shapely.intersects(
+                            node_polys[0], geoms[nbr_idx[start:end]]
+                        )
+            node_idx, nbr_idx = node_idx[add_edge], nbr_idx[add_edge]
+
+        # Store the edges as adjacency arrays over the `iloc` positions in the
+        # habitat dataframe. The networkx graph of the habitat, with the distance
+        # edge attributes if required, is only built when it is needed.
+        habitat_positions = np.cumsum(valid_class_bool) - 1
+        adjacency = _edges_to_csr(
+            habitat_positions[node_idx], habitat_positions[nbr_idx], len(habitat_idx)
+        )
         # Add habitat to habitats dict
         habitat = HabitatGeoGraph(
-            data=self.df.iloc[np.where(valid_class_bool)[0]],
+            data=self.df.iloc[habitat_idx],
             name=name,
-            graph=hgraph,
+            adjacency=adjacency,
             valid_classes=valid_classes,
             barrier_classes=barrier_classes,
             max_travel_distance=max_travel_distance,
@@ -790,9 +1123,25 @@ class GeoGraph:
                 GeoDataFrame (if `calc_polygons=True`) and the list of graph
                 components.
         """
-        components: List[set] = list(nx.connected_components(self.graph))
+        # Group the node ids by their (cached) component label
+        n_components, labels = self.component_labels
+        sorted_ids = self.df.index.values[np.argsort(labels, kind="stable")]
+        bounds = np.concatenate(
+            ([0], np.cumsum(np.bincount(labels, minlength=n_components)))
+        )
+        components: List[set] = [
+            set(sorted_ids[start:stop].tolist())
+            for start, stop in zip(bounds[:-1], bounds[1:])
+        ]
         if calc_polygons:
-            geom = [self.df["geometry"].loc[comp].unary_union for comp in components]
+            # Union the polygons of all components with one grouped dissolve. The
+            # groups are sorted by component label, like `components`.
+            geom = (
+                self.df[["geometry"]]
+                .assign(_component=labels)
+                .dissolve(by="_component")
+                .geometry.values
+            )
             gdf = gpd.GeoDataFrame(
                 {"geometry": geom, "class_label": -1}, crs=self.df.crs
             )
@@ -922,7 +1271,7 @@ class GeoGraph:
 
     def identify_node(
         self, node_id: int, other_graph: GeoGraph, mode: str
-    ) -> List[int]:
+    ) -> np.ndarray:
         """Return all node ids in `other_graph` which identify with `node_id`."""
         return binary_graph_operations.identify_node(
             self.df.loc[node_id], other_graph=other_graph, mode=mode
@@ -936,6 +1285,7 @@ class GeoGraph:
         self.graph.remove_nodes_from(node_ids)
         # Remove data of node from df
         self.df = self.df.drop(index=node_ids)
+        self._invalidate_caches()
 
     def _add_node(
         self,
@@ -976,9 +1326,8 @@ class GeoGraph:
             self.df = self.df.sort_index()
 
         # Add edges to adjacency list
-        self.graph.add_edges_from(
-            zip_longest([node_id], adjacencies, fillvalue=node_id)
-        )
+        self.graph.add_edges_from((node_id, node) for node in adjacencies)
+        self._invalidate_caches()
 
     # pylint: disable=dangerous-default-value
     def _add_nodes(
@@ -1010,7 +1359,7 @@ class GeoGraph:
 
     def _merge_graph(self, other: GeoGraph) -> GeoGraph:
 
-        for node_id in self.rtree.intersection(other.bounds):
+        for node_id in self.rtree.query(shapely.box(*other.bounds)):
             print(self.identify_node(node_id, other, mode="edge"))
 
         raise NotImplementedError
@@ -1029,20 +1378,23 @@ class HabitatGeoGraph(GeoGraph):
         max_travel_distance: Optional[float] = 0,
         add_distance: bool = False,
         add_component_edges: bool = False,
+        *,
+        adjacency: Optional[Tuple[np.ndarray, np.ndarray]] = None,
     ) -> None:
         """
         Class to represent a habitat GeoGraph.
 
         This class can load a habitat GeoGraph from a GeoDataFrame and networkx
-        graph object, or alternatively load saved pickle or compressed pickle
-        file with the graph, dataframe, and all metadata. Valid saved file formats
-        are .pickle, .pkl, .gz, or .bz2.
+        graph object or adjacency arrays, or alternatively load saved pickle or
+        compressed pickle file with the graph, dataframe, and all metadata. Valid
+        saved file formats are .pickle, .pkl, .gz, .bz2 or .zst.
 
         Args:
             data: (GeoDataFrame or Path): Either a dataframe with the polygon
                 data for the habitat graph nodes, or a path to a saved habitat. If
                 it is a GeoDataFrame, then the other arguments in this init are
-                mandatory (except for `add_distance` and `add_component_edges`)
+                mandatory (except for `add_distance` and `add_component_edges`,
+                and either `graph` or `adjacency`)
             name (str, optional): The name of the habitat.
             graph (nx.Graph, optional): A networkx graph representing the habitat.
                 Defaults to None.
@@ -1060,25 +1412,35 @@ class HabitatGeoGraph(GeoGraph):
                 nodes in the ComponentGeoGraph created automatically for this
                 habitat with edge weights that are the distance between neighbouring
                 components. Can be computationally expensive. Defaults to False.
+            adjacency (Tuple[np.ndarray, np.ndarray], optional): The adjacency of
+                the habitat as CSR arrays over the `iloc` positions in `data`, see
+                `GeoGraph.adjacency`. If given instead of `graph`, the networkx
+                graph is only built on first access, with the distance between
+                polygons as an edge attribute if `add_distance` is True. Defaults to
+                None.
 
         Raises:
             ValueError: If `data` is of an unknown type, or if `data` is a file
             path of an invalid suffix.
         """
         # pylint: disable=super-init-not-called
+        self._invalidate_caches()
         if isinstance(data, gpd.GeoDataFrame):
             # Note that index is not reset, so it contains the loc indices of the
             # same patches in the main df
             self.df: gpd.GeoDataFrame = data
             if (
                 name is not None
-                and graph is not None
+                and (graph is not None or adjacency is not None)
                 and valid_classes is not None
                 and barrier_classes is not None
                 and max_travel_distance is not None
             ):
                 self.name: str = name
-                self.graph: nx.Graph = graph
+                if graph is not None:
+                    self.graph = graph
+                else:
+                    self._adjacency = adjacency
                 self.valid_classes: List[Union[str, int]] = valid_classes
                 self.barrier_classes: List[Union[str, int]] = barrier_classes
                 self.max_travel_distance: float = max_travel_distance
@@ -1088,12 +1450,12 @@ class HabitatGeoGraph(GeoGraph):
             load_path = pathlib.Path(data)
             assert load_path.exists()
             # Load from saved graph
-            if load_path.suffix in (".pickle", ".pkl", ".gz", ".bz2"):
+            if load_path.suffix in PICKLE_EXTENSIONS:
                 self._load_from_graph_path(load_path)
             else:
                 raise ValueError(
                     f"""Extension {load_path.suffix} unknown.
-                                 Must be one of .pickle, .pkl, .gz, .bz2."""
+                                 Must be one of .pickle, .pkl, .gz, .bz2, .zst."""
                 )
         else:
             raise ValueError(
@@ -1107,30 +1469,44 @@ class HabitatGeoGraph(GeoGraph):
         )
 
         print(
-            f"\nHabitat successfully loaded with {self.graph.number_of_nodes()} nodes",
-            f"and {self.graph.number_of_edges()} edges.",
+            f"\nHabitat successfully loaded with {len(self.df)} nodes",
+            f"and {self.number_of_edges()} edges.",
         )
 
+    def _build_graph(self) -> nx.Graph:
+        """Build the networkx graph, adding distance edge attributes if required."""
+        if not self.add_distance or self._adjacency is None:
+            return super()._build_graph()
+        graph = nx.Graph()
+        _add_nodes_from_dataframe(graph, self.df)
+        src, trg = _csr_to_edges(*self._adjacency)
+        if self.max_travel_distance == 0:
+            distances = [0.0] * len(src)
+        else:
+            geoms = self.df["geometry"].values
+            distances = shapely.distance(geoms[src], geoms[trg]).tolist()
+        node_ids = self.df.index.values
+        graph.add_edges_from(
+            (node, nbr, {"distance": distance})
+            for node, nbr, distance in zip(
+                node_ids[src].tolist(), node_ids[trg].tolist(), distances
+            )
+        )
+        return graph
+
     def _load_from_graph_path(self, load_path: pathlib.Path) -> None:
         """
         Load networkx graph and dataframe objects from a pickle file.
 
         Args:
             load_path (pathlib.Path): Path to a pickle file. Can be compressed
-            with gzip or bz2.
+            with gzip, bz2 or zstandard.
 
         Returns:
             gpd.GeoDataFrame: The dataframe containing polygon objects.
         """
-        if load_path.suffix == ".bz2":
-            with bz2.BZ2File(load_path, "rb") as bz2_file:
-                data = pickle.load(bz2_file)
-        elif load_path.suffix == ".gz":
-            with gzip.GzipFile(load_path, "rb") as gz_file:
-                data = pickle.loads(gz_file.read())
-        else:
-            with open(load_path, "rb") as file:
-                data = pickle.load(file)
+        data = _load_pickle(load_path)
+        self.graph = data["graph"]
         self.df = data["dataframe"]
         self.name = data["name"]
         self.valid_classes = data["valid_classes"]
@@ -1144,12 +1520,13 @@ class HabitatGeoGraph(GeoGraph):
 
         Args:
             save_path (pathlib.Path): Path to a pickle file. Can be compressed
-            with gzip or bz2 by passing filenames ending in `gz` or `bz2`.
+            with gzip, bz2 or zstandard by passing filenames ending in `gz`, `bz2`
+            or `zst`.
 
         Raises:
-            ValueError: If `save_path` is not a pickle, gz, or bz2 file.
+            ValueError: If `save_path` is not a pickle, gz, bz2 or zst file.
         """
-        if save_path.suffix not in (".pickle", ".pkl", ".gz", ".bz2"):
+        if save_path.suffix not in PICKLE_EXTENSIONS:
             raise ValueError(
                 """Argument `save_path` should be a pickle file or
                 compressed file."""
@@ -1163,16 +1540,7 @@ class HabitatGeoGraph(GeoGraph):
             "max_travel_distance": self.max_travel_distance,
             "add_distance": self.add_distance,
         }
-        if save_path.suffix == ".bz2":
-            with bz2.BZ2File(save_path, "wb") as bz2_file:
-                pickle.dump(data, bz2_file)
-        elif save_path.suffix == ".gz":
-            with gzip.GzipFile(save_path, "wb") as gz_file:
-                gz_file.write(pickle.dumps(data))
-        else:
-            with open(save_path, "wb") as file:
-                pickle.dump(data, file)
-        save_path.chmod(0o664)
+        _save_pickle(data, save_path)
 
 
 class ComponentGeoGraph(GeoGraph):
@@ -1209,6 +1577,7 @@ class ComponentGeoGraph(GeoGraph):
                 their corresponding polygons as an edge attribute. Defaults to False.
         """
         # pylint: disable=super-init-not-called
+        self._invalidate_caches()
         self.has_df: bool = True
         self.graph: nx.Graph = nx.Graph()
         self.components_list: List[set] = components_list
@@ -1246,31 +1615,41 @@ class ComponentGeoGraph(GeoGraph):
         """
         # Reset index to ensure consistent indices
         df = df.reset_index(drop=True)
-        # Using this list and iterating through it is slightly faster than
-        # iterating through df due to the dataframe overhead
-        geom: List[shapely.Polygon] = df["geometry"].tolist()
-        if self.has_distance_edges:
-            self.graph = nx.complete_graph(len(df))
-        else:
-            self.graph = nx.empty_graph(len(df))
+        geom = df["geometry"].values
+        self.graph = nx.empty_graph(len(df))
         # Add node attributes
-        for node in tqdm(
-            self.graph.nodes, desc="Constructing graph", total=len(self.graph)
-        ):
-            polygon = geom[node]
-            self.graph.nodes[node]["rep_point"] = polygon.representative_point()
-            self.graph.nodes[node]["area"] = polygon.area
-            self.graph.nodes[node]["perimeter"] = polygon.length
-            self.graph.nodes[node]["bounds"] = polygon.bounds
+        self.graph.add_nodes_from(enumerate(_polygon_attributes(geom)))
 
-        # Add edge attributes if necessary
+        # Add edges between all pairs of nodes, with the distances between their
+        # polygons computed in one vectorised call
         if self.has_distance_edges:
-            for u, v, attrs in tqdm(
-                self.graph.edges.data(data=True),
-                desc="Calculating edge weights",
-                total=len(self.graph.edges),
-            ):
-                attrs["distance"] = geom[u].distance(geom[v])
+            u, v = np.triu_indices(len(df), k=1)
+            distances = shapely.distance(geom[u], geom[v]).tolist()
+            self.graph.add_edges_from(
+                (u_i, v_i, {"distance": distance})
+                for u_i, v_i, distance in zip(u.tolist(), v.tolist(), distances)
+            )
         # add index name
         df.index.name = "node_index"
         return df
+
+    def with_distance_edges(self) -> ComponentGeoGraph:
+        """
+        Return a copy of this graph with distance edges between all components.
+
+        The component polygons of this graph are reused, so it must have a
+        dataframe.
+
+        Returns:
+            ComponentGeoGraph: The components graph with distance edges.
+        """
+        if not self.has_df:
+            raise ValueError("Distance edges require the component polygons.")
+        return ComponentGeoGraph(self.components_list, self.df, add_distance_edges=True)
+
+    @property
+    def _node_index(self) -> pd.Index:
+        """Return the node ids, which are taken from the graph without a dataframe."""
+        if self.has_df:
+            return self.df.index
+        return pd.Index(list(self.graph))
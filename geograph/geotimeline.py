@@ -3,14 +3,27 @@ from __future__ import annotations
 
 import datetime
 from bisect import bisect_left
-from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
-
+from concurrent.futures import ProcessPoolExecutor
+from typing import (
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+import geopandas as gpd
 import numpy as np
 import pandas as pd
 import xarray as xr
 
 from geograph import GeoGraph
 from geograph.binary_graph_operations import NodeMap, identify_graphs
+from geograph.utils import geopandas_utils
 
 # type alias
 TimeStamp = Union[int, datetime.datetime]
@@ -20,6 +33,26 @@ class NotCachedError(Exception):
     """Basic exception for values which were not yet cached."""
 
 
+def _identify_dfs_interior(
+    df1: gpd.GeoDataFrame,
+    df2: gpd.GeoDataFrame,
+    trg_adjacency: Optional[Tuple[np.ndarray, np.ndarray]],
+    signatures1: Optional[np.ndarray],
+    signatures2: Optional[np.ndarray],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Identify the nodes of two consecutive graphs, in a worker process."""
+    if trg_adjacency is None:
+        return geopandas_utils.identify_pairs(df1, df2, mode="interior")
+    return geopandas_utils.identify_pairs_incremental(
+        df1,
+        df2,
+        mode="interior",
+        trg_adjacency=trg_adjacency,
+        signatures1=signatures1,
+        signatures2=signatures2,
+    )
+
+
 class TimedGeoGraph(GeoGraph):
     """Wrapper class for GeoGraphs with a time attribute"""
 
@@ -69,8 +102,9 @@ class GeoGraphTimeline:
                 add funcitonality to save timelines and load from disk.)
         """
 
-        # Initialize empty graphs dict
+        # Initialize empty graphs dict, together with the sorted list of its keys
         self._graphs: Dict[TimeStamp, GeoGraph] = dict()
+        self._times: List[TimeStamp] = []
         self.habitats: Dict[str, GeoGraphTimeline] = {}
         # Fill the graphs dict with graphs from `data`
         if isinstance(data, list):
@@ -80,13 +114,22 @@ class GeoGraphTimeline:
         else:
             raise NotImplementedError
 
-        # Initialize empty node map cache dictionary
-        self._node_map_cache: Dict[(TimeStamp, TimeStamp), NodeMap] = dict()
+        # Initialize empty node map cache dictionary. Each pair of times is only
+        # stored in one direction, together with the time of its src_graph
+        self._node_map_cache: Dict[
+            FrozenSet[TimeStamp], Tuple[TimeStamp, NodeMap]
+        ] = dict()
+        # Pairs of times whose cached node map is outdated, see `mark_dirty`. Their
+        # entries are kept in the cache until they are recomputed.
+        self._dirty_node_maps: Set[FrozenSet[TimeStamp]] = set()
+        # Cache of the geometry signatures of each graph, together with the
+        # dataframe they were computed from
+        self._signature_cache: Dict[TimeStamp, Tuple[gpd.GeoDataFrame, np.ndarray]] = {}
 
     @property
     def times(self) -> List[TimeStamp]:
         """Return list of valid time stamps for this GeoGraphTimeline"""
-        return list(self._graphs.keys())
+        return list(self._times)
 
     @property
     def graphs(self) -> Dict[TimeStamp, GeoGraph]:
@@ -108,33 +151,26 @@ class GeoGraphTimeline:
         """Iterate over graphs in the GeoGraphTimeline in order (earlier to later)"""
         return iter(self._graphs.values())
 
-    def _sort_by_time(self, reverse: bool = False) -> None:
-        """
-        Sort the graphs in GeoGraphTimeline accroding to timestamp from earlier to later
-
-        Args:
-            reverse (bool, optional): If False, start with the earliest date.
-                If True, sort starting with the latest date. Defaults to False.
-        """
-        self._graphs = {
-            time: self._graphs[time] for time in sorted(self._graphs, reverse=reverse)
-        }
-
     def _load_from_sequence(self, graph_list: List[TimedGeoGraph]) -> None:
         """Loads the sorted list of timed geographs into the timeline. """
 
-        # Make sure list is sorted in ascending time order (earliest = left)
-        by_time = lambda item: item.time
-        self._graphs = {graph.time: graph for graph in sorted(graph_list, key=by_time)}
+        self._load_from_dict({graph.time: graph for graph in graph_list})
 
     def _load_from_dict(self, graph_dict: Dict[TimeStamp, GeoGraph]) -> None:
         """Loads the dictionary of graphs into the timeline and sorts them by time"""
 
-        self._graphs = graph_dict
-        self._sort_by_time()
+        # Sort the times once, so that the graphs dict is built in ascending time
+        # order (earliest = left) and `times` does not need to be recomputed
+        self._times = sorted(graph_dict)
+        self._graphs = {time: graph_dict[time] for time in self._times}
 
     def identify_graphs(
-        self, time1: TimeStamp, time2: TimeStamp, use_cached: bool = True
+        self,
+        time1: TimeStamp,
+        time2: TimeStamp,
+        use_cached: bool = True,
+        *,
+        incremental: bool = False,
     ) -> NodeMap:
         """
         Identify the nodes between the graph at time `time1` and `time2` in the timeline
@@ -144,6 +180,12 @@ class GeoGraphTimeline:
             time2 (TimeStamp): timestamp index of the second graph (will be trg_graph)
             use_cached (bool, optional): Iff True, use cached NodeMaps from previous
                 computations. Defaults to True.
+            incremental (bool, optional): Iff True, nodes which are unchanged between
+                both graphs are identified via the edges of `self[time2]` instead of a
+                spatial query, which is faster if most nodes are unchanged. This is
+                only correct if the edges connect all pairs of intersecting nodes, as
+                for graphs loaded from polygon data whose edges were not removed.
+                See `geopandas_utils.identify_pairs_incremental`. Defaults to False.
 
         Returns:
             NodeMap: The one-to-many node mapping from `self[time1]` to `self[time2]`
@@ -155,11 +197,45 @@ class GeoGraphTimeline:
             except NotCachedError:
                 pass
 
-        self._node_map_cache[(time1, time2)] = identify_graphs(
-            self[time1], self[time2], mode="interior"
+        signatures = None
+        if incremental:
+            signatures = (self._signatures(time1), self._signatures(time2))
+        node_map = identify_graphs(
+            self[time1], self[time2], mode="interior", signatures=signatures
         )
+        self._node_map_cache[frozenset((time1, time2))] = (time1, node_map)
+        self._dirty_node_maps.discard(frozenset((time1, time2)))
+
+        return node_map
+
+    def mark_dirty(self, time: TimeStamp) -> None:
+        """
+        Mark the graph at `time` as changed.
 
-        return self._node_map_cache[(time1, time2)]
+        The cached node maps from and to this graph are recomputed the next time
+        they are requested via `identify_graphs` or `timestack`, all other cached
+        node maps are kept. Call this after modifying a graph of the timeline, e.g.
+        with `merge_nodes`.
+
+        Args:
+            time (TimeStamp): Time stamp of the changed graph
+        """
+        self._dirty_node_maps.update(
+            time_pair for time_pair in self._node_map_cache if time in time_pair
+        )
+
+    def _signatures(self, time: TimeStamp) -> np.ndarray:
+        """
+        Return the geometry signatures of the nodes of the graph at `time`.
+
+        The signatures are computed once per graph and cached until its dataframe
+        changes. See `geopandas_utils.geometry_signatures`.
+        """
+        cached_df, signatures = self._signature_cache.get(time, (None, None))
+        if cached_df is not self[time].df:
+            signatures = geopandas_utils.geometry_signatures(self[time].df)
+            self._signature_cache[time] = (self[time].df, signatures)
+        return signatures
 
     def node_map_cache(self, time1: TimeStamp, time2: TimeStamp) -> NodeMap:
         """
@@ -171,40 +247,97 @@ class GeoGraphTimeline:
 
         Raises:
             NotCachedError: If the combination (time1, time2) or its inverse
-                (time2, time1) have not been cached yet.
+                (time2, time1) have not been cached yet, or if the cached NodeMap is
+                outdated (see `mark_dirty`).
 
         Returns:
             NodeMap: The NodeMap to identify nodes from `self[time1]` with `self[time2]`
         """
-        if (time1, time2) in self._node_map_cache.keys():
-            return self._node_map_cache[(time1, time2)]
-        elif (time2, time1) in self._node_map_cache.keys():
-            map_from_inverse = self._node_map_cache[(time2, time1)].invert()
-            self._node_map_cache[(time1, time2)] = map_from_inverse
-            return map_from_inverse
-        else:
+        if frozenset((time1, time2)) in self._dirty_node_maps:
             raise NotCachedError
+        try:
+            src_time, node_map = self._node_map_cache[frozenset((time1, time2))]
+        except KeyError as error:
+            raise NotCachedError from error
+        if src_time == time1:
+            return node_map
+        # The inverse is computed once and then kept by the cached NodeMap
+        return node_map.invert()
 
     def _empty_node_map_cache(self) -> None:
         """ Empties the node map cache."""
         self._node_map_cache = dict()
+        self._dirty_node_maps = set()
 
-    def timestack(self, use_cached: bool = True) -> List[NodeMap]:
+    def timestack(
+        self, use_cached: bool = True, *, n_jobs: int = 1, incremental: bool = False
+    ) -> List[NodeMap]:
         """
         Performs node identification between adjacent time-slices in the graph.
 
         Args:
             use_cached (bool, optional): If True, reuses prior node-identification
                 computations. Defaults to True.
+            n_jobs (int, optional): Number of processes to identify the pairs of
+                adjacent time-slices with, -1 means one per CPU. The graphs are
+                copied to the processes, so this pays off for timelines with
+                several large graphs. Defaults to 1, which identifies the pairs one
+                after the other in this process.
+            incremental (bool, optional): Iff True, identify unchanged nodes via the
+                edges of the later graph of each pair, see `identify_graphs`.
+                Defaults to False.
 
         Returns:
             List[NodeMap]: An ordered list of the of the node maps between each two
                 adjacent time-slices in the GeoGraphTimeline
         """
-        node_maps = []
-        for time1, time2 in zip(self.times, self.times[1:]):
-            node_maps.append(self.identify_graphs(time1, time2, use_cached))
-        return node_maps
+        time_pairs = list(zip(self._times[:-1], self._times[1:]))
+        if n_jobs == 1:
+            return [
+                self.identify_graphs(time1, time2, use_cached, incremental=incremental)
+                for time1, time2 in time_pairs
+            ]
+
+        if not use_cached:
+            uncached_pairs = time_pairs
+        else:
+            uncached_pairs = [
+                pair
+                for pair in time_pairs
+                if frozenset(pair) not in self._node_map_cache
+                or frozenset(pair) in self._dirty_node_maps
+            ]
+        if len(uncached_pairs) > 0:
+            # Only send the dataframes and arrays that the identification needs to
+            # the processes, and build the NodeMaps with the original graphs here
+            with ProcessPoolExecutor(
+                max_workers=None if n_jobs == -1 else n_jobs
+            ) as pool:
+                results = pool.map(
+                    _identify_dfs_interior,
+                    [self[time1].df for time1, _ in uncached_pairs],
+                    [self[time2].df for _, time2 in uncached_pairs],
+                    [
+                        self[time2].adjacency if incremental else None
+                        for _, time2 in uncached_pairs
+                    ],
+                    [
+                        self._signatures(time1) if incremental else None
+                        for time1, _ in uncached_pairs
+                    ],
+                    [
+                        self._signatures(time2) if incremental else None
+                        for _, time2 in uncached_pairs
+                    ],
+                )
+                for (time1, time2), (src_ids, trg_ids) in zip(uncached_pairs, results):
+                    self._node_map_cache[frozenset((time1, time2))] = (
+                        time1,
+                        NodeMap.from_pairs(self[time1], self[time2], src_ids, trg_ids),
+                    )
+                    self._dirty_node_maps.discard(frozenset((time1, time2)))
+
+        return [self.node_map_cache(time1, time2) for time1, time2 in time_pairs]
 
     def timediff(self, use_cached: bool = True):
         raise NotImplementedError
@@ -243,7 +376,7 @@ class GeoGraphTimeline:
         metric_timeseries = xr.DataArray(
             [metric.value for metric in metrics],
             dims=["time"],
-            coords=[self.times],
+            coords=[self._times],
             name=name,
             attrs=attrs,
         )
@@ -283,7 +416,7 @@ class GeoGraphTimeline:
             for graph in self
         ]
 
-        return xr.concat(class_metric_dfs, dim=pd.Index(self.times, name="time"))
+        return xr.concat(class_metric_dfs, dim=pd.Index(self._times, name="time"))
 
     def get_patch_metrics(
         self, aggregator: Union[str, Callable] = "mean"
@@ -314,7 +447,7 @@ class GeoGraphTimeline:
                 )
             )
 
-        return xr.concat(metrics_dfs, dim=pd.Index(self.times, name="time"))
+        return xr.concat(metrics_dfs, dim=pd.Index(self._times, name="time"))
 
     def add_habitat(
         self,
@@ -404,14 +537,14 @@ class GeoGraphTimeline:
             return self[time].df["node_dynamic"]
         else:
             # Determine index of the selected time in self.times
-            time_index = bisect_left(self.times, time)
+            time_index = bisect_left(self._times, time)
 
             if time_index == 0:
                 raise UserWarning(
                     "Cannot calculate node dyamics for first graph in timeline."
                 )
 
-            prior_time = self.times[time_index - 1]
+            prior_time = self._times[time_index - 1]
             node_map = self.node_map_cache(prior_time, time)
 
             # Helper function to calculate dynamics type via a single map call
@@ -505,18 +638,22 @@ class GeoGraphTimeline:
             Tuple[np.ndarray, np.ndarray]: The relative and absolute node growth rates
             in units of the CRS system that the graphs are in.
         """
-        # TODO: numba for slight performance inmprovements
-
         backward_map = ~mapping
-        relative_growth_rates = np.zeros(len(backward_map.mapping))
-        absolute_growth_rates = np.zeros(len(backward_map.mapping))
-        for i, (future, past) in enumerate(backward_map.mapping.items()):
-            past_area = np.sum(backward_map.trg_graph.df.geometry.loc[past].area)
-            future_area = np.sum(backward_map.src_graph.df.geometry.loc[future].area)
-
-            relative_growth_rates[i] = (future_area - past_area) / (
-                future_area + past_area
-            )
-            absolute_growth_rates[i] = future_area - past_area
+        future_area = backward_map.src_graph.df.geometry.area.values
+        # Sum the areas of the past nodes of each future node over the CSR arrays
+        # of the mapping, which hold `iloc` positions
+        future_positions = np.repeat(
+            np.arange(len(future_area)), np.diff(backward_map.indptr)
+        )
+        past_area = np.bincount(
+            future_positions,
+            weights=backward_map.trg_graph.df.geometry.area.values[
+                backward_map.indices
+            ],
+            minlength=len(future_area),
+        )
+
+        relative_growth_rates = (future_area - past_area) / (future_area + past_area)
+        absolute_growth_rates = future_area - past_area
 
         return relative_growth_rates, absolute_growth_rates
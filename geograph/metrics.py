@@ -4,7 +4,6 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import TYPE_CHECKING, Any, Optional, Union
 
-import networkx as nx
 import numpy as np
 
 if TYPE_CHECKING:
@@ -49,6 +48,13 @@ class Metric:
         return self.value >= o.value
 
 
+def _class_patch_areas(
+    geo_graph: geograph.GeoGraph, class_value: Union[int, str]
+) -> np.ndarray:
+    """Return the area of each patch of the given class."""
+    return geo_graph.patch_areas[geo_graph.df["class_label"].values == class_value]
+
+
 ########################################################################################
 # 1. Landscape level metrics
 ########################################################################################
@@ -64,7 +70,7 @@ def _num_patches(geo_graph: geograph.GeoGraph) -> Metric:
 
 def _avg_patch_area(geo_graph: geograph.GeoGraph) -> Metric:
 
-    total_area = np.sum(geo_graph.df.area.values)
+    total_area = geo_graph.get_metric("total_area").value
     num_patches = geo_graph.get_metric("num_patches").value
 
     return Metric(
@@ -78,7 +84,7 @@ def _avg_patch_area(geo_graph: geograph.GeoGraph) -> Metric:
 
 def _total_area(geo_graph: geograph.GeoGraph) -> Metric:
     return Metric(
-        value=np.sum(geo_graph.df.area.values),
+        value=np.sum(geo_graph.patch_areas),
         name="total_area",
         description="The total area of all the patches in the graph.",
         variant="conventional",
@@ -98,8 +104,8 @@ def _patch_density(geo_graph: geograph.GeoGraph) -> Metric:
 
 def _largest_patch_index(geo_graph: geograph.GeoGraph) -> Metric:
 
-    total_area = np.sum(geo_graph.df.area.values)
-    max_patch_area = max(geo_graph.df.area.values)
+    total_area = geo_graph.get_metric("total_area").value
+    max_patch_area = np.max(geo_graph.patch_areas)
 
     return Metric(
         value=max_patch_area / total_area,
@@ -191,9 +197,7 @@ def _class_total_area(
     geo_graph: geograph.GeoGraph, class_value: Union[int, str]
 ) -> Metric:
 
-    class_areas = geo_graph.df["geometry"][
-        geo_graph.df["class_label"] == class_value
-    ].area.values
+    class_areas = _class_patch_areas(geo_graph, class_value)
 
     return Metric(
         value=np.sum(class_areas),
@@ -278,9 +282,7 @@ def _class_largest_patch_index(
         https://pylandstats.readthedocs.io/en/latest/landscape.html
     """
     total_area = geo_graph.get_metric("total_area").value
-    class_areas = geo_graph.df["geometry"][
-        geo_graph.df["class_label"] == class_value
-    ].area
+    class_areas = _class_patch_areas(geo_graph, class_value)
 
     description = (
         "Proportion of total landscape compriesed by largest patch of "
@@ -379,9 +381,7 @@ def _class_effective_mesh_size(
     Definition taken from:
         https://pylandstats.readthedocs.io/en/latest/landscape.html
     """
-    class_areas = geo_graph.df["geometry"][
-        geo_graph.df["class_label"] == class_value
-    ].area
+    class_areas = _class_patch_areas(geo_graph, class_value)
     total_area = geo_graph.get_metric("total_area").value
 
     description = (
@@ -418,8 +418,11 @@ CLASS_METRICS_DICT = {
 
 
 def _num_components(geo_graph: geograph.GeoGraph) -> Metric:
+    # Uses the component labels cached on the graph, which are shared with
+    # `get_graph_components` and do not require the networkx graph
+    n_components, _ = geo_graph.component_labels
     return Metric(
-        value=nx.number_connected_components(geo_graph.graph),
+        value=n_components,
         name="num_components",
         description="The number of connected components in the graph.",
         variant="component",
@@ -453,9 +456,14 @@ def _avg_component_isolation(geo_graph: geograph.GeoGraph) -> Metric:
             """Warning: very computationally expensive for graphs with more
               than ~100 components."""
         )
-        geo_graph.components = geo_graph.get_graph_components(
-            calc_polygons=True, add_distance_edges=True
-        )
+        if geo_graph.components.has_df:
+            # Reuse the component polygons, e.g. from `avg_component_area`, and
+            # only add the distance edges
+            geo_graph.components = geo_graph.components.with_distance_edges()
+        else:
+            geo_graph.components = geo_graph.get_graph_components(
+                calc_polygons=True, add_distance_edges=True
+            )
     comp_geograph = geo_graph.components
     if len(comp_geograph.components_list) == 1:
         val: Any = 0
@@ -0,0 +1,62 @@
+"""Tests for the binary operations between GeoGraph objects."""
+import itertools
+import pathlib
+
+import pytest
+
+from geograph import GeoGraph
+from geograph.binary_graph_operations import NodeMap, identify_graphs
+from geograph.utils.geopandas_utils import geometry_signatures
+
+TEST_DATA_FOLDER = pathlib.Path(__file__).parent / "testdata"
+
+
+@pytest.fixture(scope="module", name="timestack_graphs")
+def fixture_timestack_graphs():
+    """Load the graphs of the timestack test data."""
+    return [
+        GeoGraph(TEST_DATA_FOLDER / "timestack" / f"time_{time}.gpkg")
+        for time in range(5)
+    ]
+
+
+@pytest.mark.parametrize("mode", ["corner", "edge", "interior"])
+def test_identify_graphs_incremental(timestack_graphs, mode):
+    """Incremental identification gives the same NodeMap as the full query."""
+    for graph1, graph2 in itertools.permutations(timestack_graphs, 2):
+        signatures = (geometry_signatures(graph1.df), geometry_signatures(graph2.df))
+        full = identify_graphs(graph1, graph2, mode=mode)
+        inc = identify_graphs(graph1, graph2, mode=mode, signatures=signatures)
+        assert inc == full
+        assert inc.mapping == full.mapping
+
+
+def test_node_map_rejects_unknown_nodes(timestack_graphs):
+    """NodeMap raises on node indices that are not in the graphs."""
+    graph1, graph2 = timestack_graphs[:2]
+    with pytest.raises(ValueError):
+        NodeMap(graph1, graph2, {graph1.df.index[0]: [max(graph2.df.index) + 1]})
+    with pytest.raises(ValueError):
+        NodeMap(graph1, graph2, {max(graph1.df.index) + 1: []})
+
+
+def test_node_map_mapping_matches_csr(timestack_graphs):
+    """The mapping of a NodeMap is rebuilt from its CSR arrays."""
+    graph1, graph2 = timestack_graphs[:2]
+    src_node, trg_node = graph1.df.index[0], graph2.df.index[0]
+    sparse = NodeMap(graph1, graph2, {src_node: [trg_node]})
+    full_mapping = {node: [] for node in graph1.df.index}
+    full_mapping[src_node] = [trg_node]
+    full = NodeMap(graph1, graph2, full_mapping)
+    assert sparse == full
+    assert sparse.mapping == full.mapping
+
+
+@pytest.mark.parametrize("mode", ["corner", "edge", "interior"])
+def test_identify_graphs_threaded(timestack_graphs, mode):
+    """Identifying with several threads gives the same NodeMap as with one."""
+    for graph1, graph2 in itertools.permutations(timestack_graphs, 2):
+        serial = identify_graphs(graph1, graph2, mode=mode)
+        threaded = identify_graphs(graph1, graph2, mode=mode, n_jobs=4)
+        assert threaded == serial
+        assert threaded.mapping == serial.mapping
@@ -0,0 +1,69 @@
+"""Tests for the GeoGraph class."""
+import pathlib
+
+import pytest
+
+from geograph import GeoGraph
+from geograph.geograph import ComponentGeoGraph
+
+TEST_DATA_FOLDER = pathlib.Path(__file__).parent / "testdata"
+
+
+@pytest.fixture(name="geo_graph")
+def fixture_geo_graph():
+    """Load the graph of the first time step of the timestack test data."""
+    return GeoGraph(TEST_DATA_FOLDER / "timestack" / "time_0.gpkg")
+
+
+def test_adjacency_follows_graph_edits(geo_graph):
+    """The adjacency is cached until the networkx graph is assigned again."""
+    graph = geo_graph.graph
+    n_components = geo_graph.component_labels[0]
+    n_edges = geo_graph.number_of_edges()
+    graph.remove_edges_from(list(graph.edges))
+    assert geo_graph.number_of_edges() == n_edges
+    geo_graph.graph = graph
+    assert geo_graph.number_of_edges() == 0
+    assert geo_graph.component_labels[0] == geo_graph.number_of_nodes()
+    assert geo_graph.component_labels[0] > n_components
+
+
+def test_adjacency_follows_merge_nodes(geo_graph):
+    """Merging nodes updates the cached adjacency."""
+    node, neighbour = next(iter(geo_graph.graph.edges))
+    n_edges = geo_graph.number_of_edges()
+    geo_graph.merge_nodes([node, neighbour], class_label="merged")
+    assert geo_graph.number_of_edges() == geo_graph.graph.number_of_edges()
+    assert geo_graph.number_of_edges() < n_edges
+
+
+def test_component_graph_without_df():
+    """A ComponentGeoGraph without polygons counts its nodes from the graph."""
+    components = ComponentGeoGraph([{0, 1}, {2}, {3}])
+    assert components.number_of_nodes() == 3
+    assert components.number_of_edges() == 0
+
+
+@pytest.mark.parametrize("suffix", [".parquet", ".pkl.zst"])
+def test_save_and_load_graph(geo_graph, tmp_path, suffix):
+    """A saved graph is loaded again with the same polygons and edges."""
+    save_path = tmp_path / f"graph{suffix}"
+    geo_graph.save_graph(save_path)
+    loaded = GeoGraph(save_path)
+    assert loaded.df.index.equals(geo_graph.df.index)
+    assert loaded.df.geometry.geom_equals(geo_graph.df.geometry).all()
+    assert (loaded.df.class_label == geo_graph.df.class_label).all()
+    assert set(map(frozenset, loaded.graph.edges)) == set(
+        map(frozenset, geo_graph.graph.edges)
+    )
+
+
+def test_save_graph_keeps_existing_edges_file(geo_graph, tmp_path):
+    """Saving in parquet format does not overwrite an existing edges file."""
+    save_path = tmp_path / "graph.parquet"
+    edges_path = tmp_path / "graph.edges.npy"
+    edges_path.write_bytes(b"edges")
+    with pytest.raises(UserWarning):
+        geo_graph.save_graph(save_path)
+    assert edges_path.read_bytes() == b"edges"
+    assert not save_path.exists()
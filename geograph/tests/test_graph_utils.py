@@ -0,0 +1,43 @@
+"""Tests for the graph utility functions of the visualisation."""
+import pathlib
+
+import geopandas as gpd
+import pandas as pd
+import pytest
+import shapely.geometry
+
+from geograph.visualisation import graph_utils
+
+TEST_DATA_FOLDER = pathlib.Path(__file__).parent / "testdata"
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_geojson_features_matches_geo_interface(monkeypatch, use_orjson):
+    """The GeoJSON features agree with the geopandas `__geo_interface__`."""
+    if use_orjson:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(graph_utils, "orjson", None)
+    df = gpd.read_file(TEST_DATA_FOLDER / "timestack" / "time_0.gpkg")
+    # Needs all 17 significant digits to round-trip
+    df["area"] = df.area / 3 + 0.12345678901234567
+    df["date"] = pd.date_range("2020-01-01 12:30", periods=len(df), freq="D")
+    df.loc[df.index[0], "geometry"] = None
+
+    features = graph_utils.geojson_features(df)["features"]
+    expected = df.__geo_interface__["features"]
+
+    assert len(features) == len(expected)
+    for feature, expected_feature in zip(features, expected):
+        properties = dict(feature["properties"])
+        expected_properties = dict(expected_feature["properties"])
+        assert feature["id"] == expected_feature["id"]
+        assert feature["type"] == "Feature"
+        assert pd.Timestamp(properties.pop("date")) == expected_properties.pop("date")
+        assert properties == expected_properties
+        if expected_feature["geometry"] is None:
+            assert feature["geometry"] is None
+        else:
+            assert shapely.geometry.shape(feature["geometry"]).equals(
+                shapely.geometry.shape(expected_feature["geometry"])
+            )
@@ -0,0 +1,37 @@
+"""Tests for the rasterio utility functions."""
+import geopandas as gpd
+import numpy as np
+import pytest
+
+from geograph.utils.rasterio_utils import polygonise
+
+
+def _sorted_polygons(df: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+    """Sort polygons by class label, area and position to compare dataframes."""
+    centroids = df.geometry.centroid
+    return (
+        df.assign(area=df.area, x=centroids.x, y=centroids.y)
+        .sort_values(["class_label", "area", "x", "y"])
+        .reset_index(drop=True)
+    )
+
+
+@pytest.mark.parametrize("tile_size", [3, 5, 7, 64])
+@pytest.mark.parametrize("connectivity", [4, 8])
+def test_polygonise_tiled(tile_size, connectivity):
+    """Tiled polygonisation gives the same polygons as the full polygonisation."""
+    rng = np.random.default_rng(tile_size)
+    data_array = rng.integers(0, 3, size=(23, 31)).astype(np.uint8)
+    full = _sorted_polygons(polygonise(data_array, connectivity=connectivity))
+    tiled = _sorted_polygons(
+        polygonise(data_array, connectivity=connectivity, tile_size=tile_size)
+    )
+    assert len(tiled) == len(full)
+    assert (tiled.class_label == full.class_label).all()
+    assert tiled.geometry.geom_equals(full.geometry).all()
+
+
+def test_polygonise_rejects_non_positive_tile_size():
+    """A tile size of zero raises a ValueError."""
+    with pytest.raises(ValueError):
+        polygonise(np.zeros((4, 4), dtype=np.uint8), tile_size=0)
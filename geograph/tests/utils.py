@@ -119,7 +119,7 @@ def plot_identified_nodes(
             which the current `node` was identified
     """
 
-    candidate_ids = list(other_graph.rtree.intersection(node["geometry"].bounds))
+    candidate_ids = other_graph.rtree.query(node["geometry"]).tolist()
 
     # Create color palette dependent on existing class labels
     class_labels = set(other_graph.df.loc[candidate_ids, "class_label"])
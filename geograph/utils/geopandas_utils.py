@@ -1,15 +1,37 @@
 """Helper functions for operating with geopandas objects."""
-from typing import Dict, List
+import contextlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import geopandas as gpd
 import networkx as nx
-import tqdm
+import numpy as np
+import pandas as pd
+import scipy.sparse
+import shapely
 from geograph.utils.polygon_utils import (
     connect_with_interior_bulk,
     connect_with_interior_or_edge_bulk,
     connect_with_interior_or_edge_or_corner_bulk,
 )
+from scipy.sparse.csgraph import connected_components
 from shapely.geometry import MultiPolygon
+from shapely.geometry.base import BaseGeometry
+
+try:
+    import numba
+except ImportError:
+    numba = None
 
 # For switching identifiction mode in `identify_node`
 _BULK_SPATIAL_IDENTIFICATION_FUNCTION = {
@@ -18,12 +40,316 @@ _BULK_SPATIAL_IDENTIFICATION_FUNCTION = {
     "interior": connect_with_interior_bulk,
 }
 
+# Minimal number of dimensions in which the bounding boxes of two polygons must
+# overlap with positive extent for them to be identified in the given mode: Polygons
+# that overlap in their interiors have a bounding box intersection of positive area,
+# and polygons that share an edge have a bounding box intersection of positive
+# width or height.
+_MIN_BOUNDS_OVERLAP_DIMS = {"corner": 0, "edge": 1, "interior": 2}
+
+# type alias: maps each class label to a spatial index over the geometries with
+# this label, together with the `iloc` positions of these geometries in the df
+ClassRtrees = Dict[Union[str, int], Tuple[shapely.STRtree, np.ndarray]]
+
+
+def _n_workers(n_jobs: int) -> int:
+    """Return the number of workers for `n_jobs`, where -1 means all CPUs."""
+    if n_jobs == -1:
+        return os.cpu_count() or 1
+    return max(n_jobs, 1)
+
+
+def _parallel_map(func: Callable, iterable: Iterable, n_jobs: int = 1) -> List:
+    """
+    Return `list(map(func, iterable))`, evaluated by `n_jobs` threads.
+
+    Threads are sufficient here, since shapely releases the GIL in its vectorised
+    operations.
+
+    Args:
+        func (Callable): The function to apply.
+        iterable (Iterable): The arguments to apply `func` to.
+        n_jobs (int, optional): Number of threads to use, -1 means one per CPU.
+            Defaults to 1, which runs serially without a thread pool.
+
+    Returns:
+        List: The results in the order of `iterable`.
+    """
+    if _n_workers(n_jobs) == 1:
+        return list(map(func, iterable))
+    with ThreadPoolExecutor(max_workers=_n_workers(n_jobs)) as executor:
+        return list(executor.map(func, iterable))
+
+
+def _source_chunks(src_ids: np.ndarray, n_chunks: int) -> List[np.ndarray]:
+    """
+    Split the positions of the sorted `src_ids` into `n_chunks` contiguous chunks.
+
+    The chunks are of roughly equal size, but all positions of the same source node
+    are in the same chunk.
+
+    Args:
+        src_ids (np.ndarray): Sorted source node ids of candidate pairs.
+        n_chunks (int): Number of chunks to split into.
+
+    Returns:
+        List[np.ndarray]: The positions in `src_ids` of each chunk.
+    """
+    if len(src_ids) == 0:
+        return [np.arange(0)]
+    splits = np.linspace(0, len(src_ids), n_chunks + 1).astype(int)[1:-1]
+    # Move each split back to the first position of its source node
+    splits = np.unique(np.searchsorted(src_ids, src_ids[splits]))
+    return np.split(np.arange(len(src_ids)), splits[splits > 0])
+
+
+def bounds_overlap_dims(bounds1: np.ndarray, bounds2: np.ndarray) -> np.ndarray:
+    """
+    Return the number of dimensions in which the given bounding boxes overlap.
+
+    Args:
+        bounds1 (np.ndarray): Array of bounding boxes of shape (N, 4), as returned by
+            `shapely.bounds`.
+        bounds2 (np.ndarray): Array of bounding boxes which is broadcastable to the
+            shape of `bounds1`.
+
+    Returns:
+        np.ndarray: Integer array of shape (N,) with the number of dimensions (0, 1
+            or 2) in which the intersection of the bounding boxes has positive extent.
+            Bounding boxes which do not intersect at all are not treated separately.
+    """
+    width = np.minimum(bounds1[..., 2], bounds2[..., 2]) - np.maximum(
+        bounds1[..., 0], bounds2[..., 0]
+    )
+    height = np.minimum(bounds1[..., 3], bounds2[..., 3]) - np.maximum(
+        bounds1[..., 1], bounds2[..., 1]
+    )
+    return (width > 0).astype(int) + (height > 0)
+
+
+def _bounds_overlap_mask_numpy(
+    bounds1: np.ndarray, bounds2: np.ndarray, min_dims: int
+) -> np.ndarray:
+    """
+    Return mask of the bounding box pairs which overlap in at least `min_dims` dims.
+
+    Args:
+        bounds1 (np.ndarray): Array of bounding boxes of shape (N, 4), as returned by
+            `shapely.bounds`.
+        bounds2 (np.ndarray): Array of bounding boxes of shape (N, 4).
+        min_dims (int): Minimal number of dimensions of positive overlap extent, see
+            `bounds_overlap_dims`.
+
+    Returns:
+        np.ndarray: Boolean array of shape (N,).
+    """
+    return bounds_overlap_dims(bounds1, bounds2) >= min_dims
+
+
+def _bounds_overlap_mask_loop(
+    bounds1: np.ndarray, bounds2: np.ndarray, min_dims: int
+) -> np.ndarray:
+    """
+    Return mask of the bounding box pairs which overlap in at least `min_dims` dims.
+
+    Same as `_bounds_overlap_mask_numpy`, but in a single pass over the bounding
+    boxes without temporary arrays. Only fast when compiled with numba.
+    """
+    is_valid = np.empty(len(bounds1), dtype=np.bool_)
+    for i in range(len(bounds1)):
+        width = min(bounds1[i, 2], bounds2[i, 2]) - max(bounds1[i, 0], bounds2[i, 0])
+        height = min(bounds1[i, 3], bounds2[i, 3]) - max(bounds1[i, 1], bounds2[i, 1])
+        is_valid[i] = int(width > 0) + int(height > 0) >= min_dims
+    return is_valid
+
+
+# Use the compiled bounding box check if numba is available
+if numba is not None:
+    _bounds_overlap_mask = numba.njit(cache=True)(_bounds_overlap_mask_loop)
+else:
+    _bounds_overlap_mask = _bounds_overlap_mask_numpy
+
+
+@contextlib.contextmanager
+def _prepared(geometries: Union[np.ndarray, BaseGeometry]) -> Iterator[None]:
+    """
+    Prepare geometries for repeated predicate evaluations within the context.
+
+    Preparing changes the geometry objects in-place. Only the geometries which
+    were not prepared before are prepared, and these are released again on exit,
+    so that the caller's geometries are left as they were.
+
+    Args:
+        geometries (Union[np.ndarray, BaseGeometry]): Array of geometries or a
+            single geometry.
+    """
+    geometries = np.asarray(geometries, dtype=object).ravel()
+    newly_prepared = geometries[~shapely.is_prepared(geometries)]
+    shapely.prepare(newly_prepared)
+    try:
+        yield
+    finally:
+        shapely.destroy_prepared(newly_prepared)
+
+
+def _filter_candidates(
+    src_geometries: Union[np.ndarray, BaseGeometry],
+    trg_geometries: np.ndarray,
+    have_valid_overlap: Callable,
+    min_bounds_overlap_dims: int,
+) -> np.ndarray:
+    """
+    Return mask of candidate pairs which pass the overlap check of an identification.
+
+    The bounding box check and the spatial overlap check are fused into one pass:
+    the mode specific overlap function is only evaluated on the pairs which pass
+    the cheaper bounding box check.
+
+    Args:
+        src_geometries (Union[np.ndarray, BaseGeometry]): Array of source geometries
+            of the candidate pairs, or a single geometry shared by all pairs.
+        trg_geometries (np.ndarray): Array of target geometries of the candidate
+            pairs.
+        have_valid_overlap (Callable): The bulk overlap function of the mode, from
+            `_BULK_SPATIAL_IDENTIFICATION_FUNCTION`.
+        min_bounds_overlap_dims (int): The minimal bounding box overlap of the mode,
+            from `_MIN_BOUNDS_OVERLAP_DIMS`.
+
+    Returns:
+        np.ndarray: Boolean mask which is True for the valid candidate pairs.
+    """
+    if min_bounds_overlap_dims == 0:
+        return np.asarray(have_valid_overlap(src_geometries, trg_geometries))
+
+    trg_bounds = shapely.bounds(trg_geometries)
+    src_bounds = np.broadcast_to(shapely.bounds(src_geometries), trg_bounds.shape)
+    is_valid = _bounds_overlap_mask(src_bounds, trg_bounds, min_bounds_overlap_dims)
+    (candidates,) = np.nonzero(is_valid)
+    if np.ndim(src_geometries) > 0:
+        src_geometries = src_geometries[candidates]
+    is_valid[candidates] = have_valid_overlap(
+        src_geometries, trg_geometries[candidates]
+    )
+    return is_valid
+
+
+def group_by_class(labels: np.ndarray) -> Dict[Union[str, int], np.ndarray]:
+    """
+    Return the `iloc` positions of each class label in `labels`.
+
+    The labels are integer-coded once, so that grouping is a single sort of
+    integer codes instead of one comparison of the full label array per class.
+
+    Args:
+        labels (np.ndarray): Array of class labels.
+
+    Returns:
+        Dict[Union[str, int], np.ndarray]: A dictionary mapping each class label to
+            the sorted positions in `labels` at which it occurs.
+    """
+    codes, classes = pd.factorize(labels)
+    # Missing labels are coded as -1 and sorted to the front, where we drop them
+    is_missing = codes < 0
+    positions = np.argsort(codes, kind="stable")[np.count_nonzero(is_missing) :]
+    counts = np.bincount(codes[~is_missing], minlength=len(classes))
+    return dict(zip(classes, np.split(positions, np.cumsum(counts)[:-1])))
+
+
+def duplicate_groups(df: gpd.GeoDataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Group the rows of `df` with the same class label and geometry.
+
+    Geometries are compared by their WKB representation, i.e. they must have the
+    same coordinates in the same order to be grouped together.
+
+    Args:
+        df (gpd.GeoDataFrame): GeoDataFrame with `geometry` and `class_label` column.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The group code of each row of `df`, and the
+            `iloc` positions of the first row of each group (the representatives).
+    """
+    label_codes, _ = pd.factorize(df["class_label"].values)
+    wkb_codes, wkb_uniques = pd.factorize(shapely.to_wkb(df.geometry.values))
+    keys = (label_codes.astype(np.int64) + 1) * len(wkb_uniques) + wkb_codes
+    _, representatives, group_codes = np.unique(
+        keys, return_index=True, return_inverse=True
+    )
+    return group_codes, representatives
+
+
+def _expand_pairs(
+    group_codes: np.ndarray, rep_src_ids: np.ndarray, trg_ids: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Expand the identified pairs of group representatives to all group members.
+
+    Args:
+        group_codes (np.ndarray): The group code of each source node, as returned by
+            `duplicate_groups`.
+        rep_src_ids (np.ndarray): Sorted group codes of the identified pairs.
+        trg_ids (np.ndarray): Target positions of the identified pairs, sorted
+            within each group.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The `(src_ids, trg_ids)` pairs of all source
+            nodes, sorted by `src_ids` and then by `trg_ids`.
+    """
+    counts = np.bincount(rep_src_ids, minlength=group_codes.max(initial=-1) + 1)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    # Each source node repeats the slice of `trg_ids` of its representative
+    src_counts = counts[group_codes]
+    src_ids = np.repeat(np.arange(len(group_codes)), src_counts)
+    src_offsets = np.concatenate(([0], np.cumsum(src_counts)[:-1]))
+    slice_positions = np.arange(len(src_ids)) + np.repeat(
+        starts[group_codes] - src_offsets, src_counts
+    )
+    return src_ids, trg_ids[slice_positions]
+
+
+def class_rtrees(
+    df: gpd.GeoDataFrame, class_labels: Optional[Iterable] = None
+) -> ClassRtrees:
+    """
+    Return one spatial index per class label in `df`.
+
+    Querying the spatial index of a class directly returns only candidates of the
+    same class, which avoids filtering out candidates of other classes afterwards.
+
+    Args:
+        df (gpd.GeoDataFrame): The dataframe for which to build the spatial indices.
+            Must contain a `class_label` column.
+        class_labels (Iterable, optional): If given, only build the spatial indices
+            of these class labels. Defaults to None, in which case all class labels
+            of `df` are indexed.
+
+    Returns:
+        ClassRtrees: A dictionary mapping each class label to a tuple of the
+            `shapely.STRtree` of the geometries of this class and the `iloc`
+            positions of these geometries in `df`.
+    """
+    geometries = np.asarray(df.geometry.values)
+    class_groups = group_by_class(df["class_label"].values)
+    if class_labels is not None:
+        class_groups = {
+            class_label: class_groups[class_label]
+            for class_label in class_labels
+            if class_label in class_groups
+        }
+    return {
+        class_label: (shapely.STRtree(geometries[positions]), positions)
+        for class_label, positions in class_groups.items()
+    }
+
 
 def identify_node(
-    node: dict, other_df: gpd.GeoDataFrame, mode: str = "corner"
-) -> List[int]:
+    node: dict,
+    other_df: gpd.GeoDataFrame,
+    mode: str = "corner",
+    rtrees: Optional[ClassRtrees] = None,
+) -> np.ndarray:
     """
-    Return list of all `loc` in `other_df` which identify with the given `node`.
+    Return array of all `loc` in `other_df` which identify with the given `node`.
 
     Args:
         node (dict): The node for which to find nodes in `other_df` that can be
@@ -40,30 +366,284 @@ def identify_node(
               edges will be identified with each other.
             - interior: Polygons of the same `class_label` which overlap will be
               identified with each other. Touching corners or edges are not counted.
+        rtrees (ClassRtrees, optional): The spatial indices per class label of
+            `other_df`, as returned by `class_rtrees`. If given, only the spatial
+            index of the class of `node` is queried. Defaults to None, in which
+            case the spatial index of `other_df` is used.
 
     Returns:
-        np.ndarray: List of node `loc` in `other_df` which identify with `node`.
+        np.ndarray: Array of node `loc` in `other_df` which identify with `node`,
+            with the dtype of the index of `other_df`. The order is unspecified.
     """
     # Mode switch
     assert mode in ["corner", "edge", "interior"]
     have_valid_overlap = _BULK_SPATIAL_IDENTIFICATION_FUNCTION[mode]
 
-    # Get potential candidates for overlap
-    candidate_ids = other_df.sindex.query(node["geometry"], sort=True)
-    # Filter candidates according to the same class label
-    candidate_ids = candidate_ids[
-        other_df["class_label"].values[candidate_ids] == node["class_label"]
-    ]
-    # Filter candidates accroding to correct spatial overlap
-    candidate_ids = candidate_ids[
-        have_valid_overlap(node["geometry"], other_df.geometry.values[candidate_ids])
+    # Prepare the node geometry once, so that all predicate evaluations against
+    # candidates below can reuse the prepared geometry
+    with _prepared(node["geometry"]):
+        # Get potential candidates for overlap with the same class label
+        if rtrees is not None:
+            if node["class_label"] not in rtrees:
+                return other_df.index.values[:0]
+            rtree, positions = rtrees[node["class_label"]]
+            candidate_ids = positions[
+                rtree.query(node["geometry"], predicate="intersects")
+            ]
+        else:
+            candidate_ids = other_df.sindex.query(
+                node["geometry"], predicate="intersects"
+            )
+            candidate_ids = candidate_ids[
+                other_df["class_label"].values[candidate_ids] == node["class_label"]
+            ]
+        # Filter candidates accroding to correct spatial overlap
+        candidate_ids = candidate_ids[
+            _filter_candidates(
+                node["geometry"],
+                np.asarray(other_df.geometry.values)[candidate_ids],
+                have_valid_overlap,
+                _MIN_BOUNDS_OVERLAP_DIMS[mode],
+            )
+        ]
+
+        return other_df.index.values[candidate_ids]
+
+
+def identify_pairs(
+    df1: gpd.GeoDataFrame,
+    df2: gpd.GeoDataFrame,
+    mode: str,
+    rtrees: Optional[ClassRtrees] = None,
+    *,
+    n_jobs: int = 1,
+    deduplicate: bool = False,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return the `iloc` positions of all pairs of identified nodes in `df1` and `df2`.
+
+    See `identify_dfs` for a description of the arguments.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Arrays `src_ids` and `trg_ids` such that the
+            node at `iloc` position `src_ids[i]` in `df1` identifies with the node at
+            `iloc` position `trg_ids[i]` in `df2`. The pairs are sorted by
+            `src_ids` and then by `trg_ids`.
+    """
+    assert df1.crs == df2.crs, "CRS systems do not agree."
+    # Mode switch
+    assert mode in ["corner", "edge", "interior"]
+    have_valid_overlap = _BULK_SPATIAL_IDENTIFICATION_FUNCTION[mode]
+
+    if deduplicate:
+        # Identify only one representative of each group of nodes with the same
+        # class label and geometry, and share its identifications with the group
+        group_codes, representatives = duplicate_groups(df1)
+        rep_src_ids, trg_ids = identify_pairs(
+            df1.iloc[representatives], df2, mode, rtrees=rtrees, n_jobs=n_jobs
+        )
+        return _expand_pairs(group_codes, rep_src_ids, trg_ids)
+
+    src_geometries = np.asarray(df1.geometry.values)
+    trg_geometries = np.asarray(df2.geometry.values)
+    # Prepare the query geometries for repeated predicate evaluations. Geometries
+    # prepared here are released again afterwards.
+    with _prepared(src_geometries):
+        if rtrees is None:
+            # Only index the classes which are queried
+            rtrees = class_rtrees(
+                df2, class_labels=pd.unique(df1["class_label"].values)
+            )
+
+        # Get potential candidates for overlap with one bulk query per class label.
+        # All identification modes require the polygons to intersect, so we can let
+        # the spatial index discard non-intersecting candidates already.
+
+        def query_class(class_group: Tuple) -> Tuple[np.ndarray, np.ndarray]:
+            class_label, src_positions = class_group
+            rtree, trg_positions = rtrees[class_label]
+            class_src_ids, class_trg_ids = rtree.query(
+                src_geometries[src_positions], predicate="intersects"
+            )
+            return src_positions[class_src_ids], trg_positions[class_trg_ids]
+
+        class_groups = [
+            (class_label, src_positions)
+            for class_label, src_positions in group_by_class(
+                df1["class_label"].values
+            ).items()
+            if class_label in rtrees
+        ]
+        candidates = _parallel_map(query_class, class_groups, n_jobs=n_jobs)
+        src_ids = np.concatenate([np.array([], dtype=int)] + [c[0] for c in candidates])
+        trg_ids = np.concatenate([np.array([], dtype=int)] + [c[1] for c in candidates])
+        # Sort the pairs by source and then target node, which groups them for the
+        # CSR format and makes the order of target nodes per source node canonical.
+        # Filtering below keeps this order.
+        order = np.lexsort((trg_ids, src_ids))
+        src_ids, trg_ids = src_ids[order], trg_ids[order]
+
+        # Filter candidates according to correct bounding box and spatial overlap, in
+        # one chunk of candidate pairs per thread. The chunks are split between
+        # source nodes, so that no prepared geometry is used by several threads.
+        def check_overlap(chunk: np.ndarray) -> np.ndarray:
+            return _filter_candidates(
+                src_geometries[src_ids[chunk]],
+                trg_geometries[trg_ids[chunk]],
+                have_valid_overlap,
+                _MIN_BOUNDS_OVERLAP_DIMS[mode],
+            )
+
+        chunks = _source_chunks(src_ids, _n_workers(n_jobs))
+        valid_overlap = np.concatenate(
+            [np.array([], dtype=bool)] + _parallel_map(check_overlap, chunks, n_jobs)
+        )
+
+        return src_ids[valid_overlap], trg_ids[valid_overlap]
+
+
+def geometry_signatures(df: gpd.GeoDataFrame) -> np.ndarray:
+    """
+    Return a 64 bit hash of the class label and geometry of each row of `df`.
+
+    Geometries are hashed by their WKB representation, i.e. rows only have the
+    same signature if their geometries have the same coordinates in the same order.
+
+    Args:
+        df (gpd.GeoDataFrame): GeoDataFrame with `geometry` and `class_label` column.
+
+    Returns:
+        np.ndarray: The `uint64` signature of each row of `df`.
+    """
+    return pd.util.hash_pandas_object(
+        pd.DataFrame(
+            {
+                "class_label": df["class_label"].values,
+                "wkb": shapely.to_wkb(df.geometry.values),
+            }
+        ),
+        index=False,
+    ).values
+
+
+def identify_pairs_incremental(
+    df1: gpd.GeoDataFrame,
+    df2: gpd.GeoDataFrame,
+    mode: str,
+    trg_adjacency: Tuple[np.ndarray, np.ndarray],
+    *,
+    signatures1: Optional[np.ndarray] = None,
+    signatures2: Optional[np.ndarray] = None,
+    rtrees: Optional[ClassRtrees] = None,
+    n_jobs: int = 1,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return the `iloc` positions of all pairs of identified nodes in `df1` and `df2`.
+
+    Same as `identify_pairs`, but faster if most nodes are unchanged between `df1`
+    and `df2`, as between consecutive graphs of a timeline. A node of `df1` which
+    has a twin in `df2` with the same class label and geometry identifies with its
+    twin. It can only identify with other nodes of `df2` that intersect the twin,
+    so only the neighbours of the twin in `trg_adjacency` are checked instead of
+    running a spatial query. Only the changed nodes of `df1` are queried for.
+
+    This relies on `trg_adjacency` connecting all pairs of intersecting nodes of
+    `df2`, as is the case for GeoGraphs loaded from polygon data.
+
+    Args:
+        df1 (GeoDataFrame): The dataframe whose node indicies will form the domain
+        df2 (GeoDataFrame): The dataframe whose node indices will form the image
+        mode (str): The mode to use for node identification, see `identify_dfs`.
+        trg_adjacency (Tuple[np.ndarray, np.ndarray]): The adjacency of the nodes
+            in `df2` as CSR arrays `(indptr, indices)` over `iloc` positions.
+        signatures1 (np.ndarray, optional): The `geometry_signatures` of `df1`.
+            Defaults to None, in which case they are computed.
+        signatures2 (np.ndarray, optional): The `geometry_signatures` of `df2`.
+            Defaults to None, in which case they are computed.
+        rtrees (ClassRtrees, optional): The spatial indices per class label of
+            `df2`, as returned by `class_rtrees`. Defaults to None.
+        n_jobs (int, optional): Number of threads to use, -1 means one per CPU.
+            Defaults to 1.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Arrays `src_ids` and `trg_ids` of the
+            identified pairs, sorted by `src_ids` and then by `trg_ids` as for
+            `identify_pairs`.
+    """
+    assert mode in ["corner", "edge", "interior"]
+    if signatures1 is None:
+        signatures1 = geometry_signatures(df1)
+    if signatures2 is None:
+        signatures2 = geometry_signatures(df2)
+    src_geometries = np.asarray(df1.geometry.values)
+    trg_geometries = np.asarray(df2.geometry.values)
+
+    # Find the twin of each node in df1, considering only unique signatures of df2
+    is_unique = ~pd.Index(signatures2).duplicated(keep=False)
+    unique_positions = np.flatnonzero(is_unique)
+    twin_ids = pd.Index(signatures2[is_unique]).get_indexer(signatures1)
+    has_twin = twin_ids >= 0
+    twin_ids = unique_positions[twin_ids[has_twin]]
+    (twin_src_ids,) = np.nonzero(has_twin)
+    # Guard against hash collisions, and against polygons without interior, which
+    # might not identify with themselves
+    is_twin = (
+        (df1["class_label"].values[twin_src_ids] == df2["class_label"].values[twin_ids])
+        & shapely.equals_exact(
+            src_geometries[twin_src_ids], trg_geometries[twin_ids], tolerance=0
+        )
+        & (shapely.area(src_geometries[twin_src_ids]) > 0)
+    )
+    twin_src_ids, twin_ids = twin_src_ids[is_twin], twin_ids[is_twin]
+
+    # Check the neighbours of each twin with the same class label
+    indptr, indices = trg_adjacency
+    counts = indptr[twin_ids + 1] - indptr[twin_ids]
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    nbr_src_ids = np.repeat(twin_src_ids, counts)
+    nbr_ids = indices[
+        np.arange(counts.sum()) + np.repeat(indptr[twin_ids] - offsets, counts)
     ]
+    is_candidate = (
+        df1["class_label"].values[nbr_src_ids] == df2["class_label"].values[nbr_ids]
+    )
+    nbr_src_ids, nbr_ids = nbr_src_ids[is_candidate], nbr_ids[is_candidate]
+    valid_overlap = _filter_candidates(
+        src_geometries[nbr_src_ids],
+        trg_geometries[nbr_ids],
+        _BULK_SPATIAL_IDENTIFICATION_FUNCTION[mode],
+        _MIN_BOUNDS_OVERLAP_DIMS[mode],
+    )
+
+    # Query for the changed nodes as usual. Without changed nodes no spatial index
+    # is needed at all.
+    is_changed = np.ones(len(df1), dtype=bool)
+    is_changed[twin_src_ids] = False
+    (changed_ids,) = np.nonzero(is_changed)
+    if len(changed_ids) > 0:
+        changed_src_ids, changed_trg_ids = identify_pairs(
+            df1.iloc[changed_ids], df2, mode, rtrees=rtrees, n_jobs=n_jobs
+        )
+    else:
+        changed_src_ids = changed_trg_ids = np.array([], dtype=int)
 
-    return other_df.index.values[candidate_ids].tolist()
+    src_ids = np.concatenate(
+        (twin_src_ids, nbr_src_ids[valid_overlap], changed_ids[changed_src_ids])
+    )
+    trg_ids = np.concatenate((twin_ids, nbr_ids[valid_overlap], changed_trg_ids))
+    # Sort the pairs like `identify_pairs`, so both give the same NodeMap
+    order = np.lexsort((trg_ids, src_ids))
+    return src_ids[order], trg_ids[order]
 
 
 def identify_dfs(
-    df1: gpd.GeoDataFrame, df2: gpd.GeoDataFrame, mode: str
+    df1: gpd.GeoDataFrame,
+    df2: gpd.GeoDataFrame,
+    mode: str,
+    rtrees: Optional[ClassRtrees] = None,
+    *,
+    n_jobs: int = 1,
+    deduplicate: bool = False,
 ) -> Dict[int, List[int]]:
     """
     Idenitfy all nodes from `graph1` with nodes from `graph2` based on the given `mode`
@@ -82,22 +662,68 @@ def identify_dfs(
               edges will be identified with each other.
             - interior: Polygons of the same `class_label` which overlap will be
               identified with each other. Touching corners or edges are not counted.
+        rtrees (ClassRtrees, optional): The spatial indices per class label of
+            `df2`, as returned by `class_rtrees`. Defaults to None, in which case
+            they are built from `df2`.
+        n_jobs (int, optional): Number of threads to use for the spatial queries
+            and overlap checks, -1 means one per CPU. Defaults to 1.
+        deduplicate (bool, optional): Whether to identify nodes of `df1` with the
+            same class label and geometry only once. This pays off for inputs
+            with many duplicate polygons, e.g. from overlapping tiles. Defaults
+            to False.
 
     Returns:
         mapping (Dict[int, np.ndarray]): A dictionary that represents the map from
             elements of `df1` to `df2`.
     """
 
-    assert df1.crs == df2.crs, "CRS systems do not agree."
-    mapping = {index1: [] for index1 in df1.index}
+    src_ids, trg_ids = identify_pairs(
+        df1, df2, mode, rtrees=rtrees, n_jobs=n_jobs, deduplicate=deduplicate
+    )
 
-    progress_bar = tqdm.tqdm(df1.index, desc="Identifying nodes")
-    for index in progress_bar:  # TODO: Speed up & enable trivial parallelisation
-        mapping[index] = identify_node(df1.loc[index], df2, mode=mode)
+    # Group the `loc` of identified nodes in `df2` by the node in `df1`. Since
+    # `src_ids` is sorted, each group is a contiguous slice of `trg_ids`.
+    split_points = np.searchsorted(src_ids, np.arange(1, len(df1)))
+    trg_locs = np.split(df2.index.values[trg_ids], split_points)
+    mapping = {index1: locs.tolist() for index1, locs in zip(df1.index, trg_locs)}
 
     return mapping
 
 
+def merge_edge_connected_polygons(df: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+    """
+    Return a new dataframe with all geometries of `df` which share edges merged.
+
+    Only geometries of the same class label are merged. This is used to stitch
+    together polygons that were split by the boundaries of raster tiles that were
+    polygonised separately.
+
+    Args:
+        df (gpd.GeoDataFrame): The dataframe to analyse for geometries which share
+            edges
+
+    Returns:
+        gpd.GeoDataFrame: The dataframe with patches that share edges merged
+    """
+    src_ids, trg_ids = identify_pairs(df, df, mode="edge")
+    adjacency = scipy.sparse.csr_matrix(
+        (np.ones(len(src_ids), dtype=bool), (src_ids, trg_ids)),
+        shape=(len(df), len(df)),
+    )
+    _, component_labels = connected_components(adjacency, directed=False)
+
+    # Only dissolve the components with more than one geometry, all other
+    # geometries are kept as they are
+    is_merged = np.bincount(component_labels)[component_labels] > 1
+    merged_df = (
+        df[is_merged]
+        .assign(_component=component_labels[is_merged])
+        .dissolve(by="_component", aggfunc="first")
+    )
+
+    return pd.concat([df[~is_merged], merged_df], ignore_index=True)
+
+
 def merge_diagonally_connected_polygons(df: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
     """
     Return a new dataframe with all geometries of `df` which touch at corners merged.
@@ -131,4 +757,4 @@ def merge_diagonally_connected_polygons(df: gpd.GeoDataFrame) -> gpd.GeoDataFram
         new_nodes["class_label"].append(df["class_label"].loc[nodes[0]])
         new_nodes["geometry"].append(MultiPolygon(df["geometry"].loc[nodes].values))
 
-    return new_df.append(gpd.GeoDataFrame(new_nodes), ignore_index=True)
+    return pd.concat([new_df, gpd.GeoDataFrame(new_nodes)], ignore_index=True)
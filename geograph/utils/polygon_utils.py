@@ -1,6 +1,8 @@
 """Helper functions for overlap computations with polygons in shapely."""
-from typing import List
+from typing import Union
 
+import numpy as np
+import shapely
 from geopandas.array import GeometryArray
 from numpy import ndarray
 from shapely.geometry.polygon import Polygon
@@ -45,6 +47,34 @@ def de9im_match(pattern: str, target_pattern: str) -> bool:
     return True
 
 
+def de9im_match_bulk(patterns: ndarray, target_pattern: str) -> ndarray:
+    """
+    Check an array of DE-9IM patterns against a target DE-9IM pattern.
+
+    Vectorised version of `de9im_match`.
+
+    Args:
+        patterns (np.ndarray): Array of DE-9IM patterns to check as strings, e.g. as
+            returned by `shapely.relate`
+        target_pattern (str): DE-9IM pattern against which to check as string
+
+    Returns:
+        np.ndarray: Boolean array with value True, iff the pattern at the given
+            location matches with target_pattern
+    """
+    # View each pattern as a row of 9 single characters
+    chars = np.asarray(patterns, dtype="U9").view("U1").reshape(-1, 9)
+    is_match = np.ones(len(chars), dtype=bool)
+    for i, target_char in enumerate(target_pattern):
+        if target_char == "*":
+            continue
+        elif target_char == "T":
+            is_match &= chars[:, i] != "F"
+        else:
+            is_match &= chars[:, i] == target_char
+    return is_match
+
+
 def connect_with_interior_or_edge_or_corner(
     polygon1: Polygon, polygon2: Polygon
 ) -> bool:
@@ -93,13 +123,15 @@ def connect_with_interior(polygon1: Polygon, polygon2: Polygon) -> bool:
 
 
 def connect_with_interior_or_edge_or_corner_bulk(
-    polygon: Polygon, polygon_array: GeometryArray
+    polygon: Union[Polygon, GeometryArray], polygon_array: GeometryArray
 ) -> ndarray:
     """
     Return boolean array with True iff polygons overlap in interior, edges or corners.
 
     Args:
-        polygon (Polygon): A shapely Polygon
+        polygon (Union[Polygon, GeometryArray]): A shapely Polygon, or a geopandas
+            geometry array of the same length as `polygon_array` for element-wise
+            comparison
         polygon_array (GeometryArray): The other shapely Polygons in a geopandas
             geometry array
 
@@ -107,48 +139,55 @@ def connect_with_interior_or_edge_or_corner_bulk(
         np.array: Boolean array with value True, iff `polygon` and the polygon in
             `polygon_array` at the given location intersect.
     """
-    return polygon_array.intersects(polygon)
+    # `polygon` goes first so that it is used as prepared geometry if prepared
+    return shapely.intersects(polygon, polygon_array)
 
 
 def connect_with_interior_or_edge_bulk(
-    polygon: Polygon, polygon_array: GeometryArray
-) -> List[bool]:
+    polygon: Union[Polygon, GeometryArray], polygon_array: GeometryArray
+) -> ndarray:
     """
     Return boolean array with True iff polys overlap in interior/edge, but not corner.
 
     Args:
-        polygon (Polygon): A shapely Polygon
+        polygon (Union[Polygon, GeometryArray]): A shapely Polygon, or a geopandas
+            geometry array of the same length as `polygon_array` for element-wise
+            comparison
         polygon_array (GeometryArray): The other shapely Polygons in a geopandas
             geometry array
 
     Returns:
-        List[bool]: Boolean array with value True, iff `polygon` and the polygon in
+        np.array: Boolean array with value True, iff `polygon` and the polygon in
             `polygon_array` at the given location overlap in their interior/edge.
     """
-    patterns = polygon_array.relate(polygon)
-    return [
-        de9im_match(pattern, EDGE_ONLY_PATTERN) or de9im_match(pattern, OVERLAP_PATTERN)
-        for pattern in patterns
-    ]
+    # Compute the DE-9IM matrices only once and match both patterns against them.
+    # Both patterns are symmetric, so `polygon` can go first as in
+    # `connect_with_interior_bulk`.
+    patterns = shapely.relate(polygon, polygon_array)
+    return de9im_match_bulk(patterns, EDGE_ONLY_PATTERN) | de9im_match_bulk(
+        patterns, OVERLAP_PATTERN
+    )
 
 
 def connect_with_interior_bulk(
-    polygon: Polygon, polygon_array: GeometryArray
-) -> List[bool]:
+    polygon: Union[Polygon, GeometryArray], polygon_array: GeometryArray
+) -> ndarray:
     """
     Return boolean array with True iff polys overlap in interior, but not corner/edge.
 
     Args:
-        polygon (Polygon): A shapely Polygon
+        polygon (Union[Polygon, GeometryArray]): A shapely Polygon, or a geopandas
+            geometry array of the same length as `polygon_array` for element-wise
+            comparison
         polygon_array (GeometryArray): The other shapely Polygons in a geopandas
             geometry array
 
     Returns:
-        List[bool]: Boolean array with value True, iff `polygon` and the polygon in
+        np.array: Boolean array with value True, iff `polygon` and the polygon in
             `polygon_array` at the given location overlap in their interior.
     """
-    patterns = polygon_array.relate(polygon)
-    return [de9im_match(pattern, OVERLAP_PATTERN) for pattern in patterns]
+    # `polygon` goes first so that it is used as prepared geometry if prepared
+    return shapely.relate_pattern(polygon, polygon_array, OVERLAP_PATTERN)
 
 
 def collapse_empty_polygon(polygon: Polygon) -> Polygon:
@@ -1,11 +1,15 @@
 """A collection of utility functions for data loading with rasterio."""
 
-from typing import Iterable, Optional, Tuple, Union
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional, Tuple, Union
 
 import affine
 import geograph.utils.geopandas_utils as gpd_utils
 import geopandas as gpd
 import numpy as np
+import pandas as pd
+import shapely
+import shapely.geometry
 from rasterio.crs import CRS
 from rasterio.features import shapes
 from rasterio.io import DatasetReader
@@ -114,6 +118,108 @@ def read_from_lat_lon(
     )
 
 
+def _polygonise_tile(
+    data_array: np.ndarray,
+    mask: Optional[np.ndarray],
+    transform: affine.Affine,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Polygonise a single tile with connectivity 4.
+
+    The geometries are returned as WKB, which is cheap to send back from worker
+    processes.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The class labels and the WKB geometries of the
+            polygons in the tile.
+    """
+    class_labels, geometries = [], []
+    for geometry, val in shapes(
+        data_array, mask=mask, connectivity=4, transform=transform
+    ):
+        class_labels.append(int(val))
+        geometries.append(shapely.geometry.shape(geometry))
+
+    return np.array(class_labels, dtype=int), shapely.to_wkb(
+        np.array(geometries, dtype=object)
+    )
+
+
+def _tile_seams(
+    shape: Tuple[int, int], tile_size: int, transform: affine.Affine
+) -> List[shapely.geometry.LineString]:
+    """Return the lines along which a raster of `shape` is split into tiles."""
+    height, width = shape
+    seams = [
+        shapely.geometry.LineString([transform * (0, row), transform * (width, row)])
+        for row in range(tile_size, height, tile_size)
+    ]
+    seams += [
+        shapely.geometry.LineString([transform * (col, 0), transform * (col, height)])
+        for col in range(tile_size, width, tile_size)
+    ]
+    return seams
+
+
+def _polygonise_tiled(
+    data_array: np.ndarray,
+    mask: Optional[np.ndarray],
+    transform: affine.Affine,
+    crs: Optional[str],
+    *,
+    tile_size: int,
+    n_jobs: int,
+) -> gpd.GeoDataFrame:
+    """
+    Polygonise `data_array` in square tiles and merge polygons across tile seams.
+
+    See `polygonise` for a description of the arguments.
+    """
+    tile_offsets = [
+        (row, col)
+        for row in range(0, data_array.shape[0], tile_size)
+        for col in range(0, data_array.shape[1], tile_size)
+    ]
+    windows = [
+        (slice(row, row + tile_size), slice(col, col + tile_size))
+        for row, col in tile_offsets
+    ]
+    tile_args = (
+        [data_array[window] for window in windows],
+        [None if mask is None else mask[window] for window in windows],
+        [transform * affine.Affine.translation(col, row) for row, col in tile_offsets],
+    )
+
+    if n_jobs == 1:
+        results = list(map(_polygonise_tile, *tile_args))
+    else:
+        with ProcessPoolExecutor(max_workers=None if n_jobs == -1 else n_jobs) as pool:
+            results = list(pool.map(_polygonise_tile, *tile_args))
+
+    df = gpd.GeoDataFrame(
+        {
+            "geometry": gpd.GeoSeries.from_wkb(
+                np.concatenate([np.array([], dtype=object)] + [r[1] for r in results])
+            ),
+            "class_label": np.concatenate(
+                [np.array([], dtype=int)] + [r[0] for r in results]
+            ),
+        },
+        crs=crs,
+    )
+
+    # Only polygons that touch a seam can have been split by the tiling
+    on_seam = np.zeros(len(df), dtype=bool)
+    seams = _tile_seams(data_array.shape, tile_size, transform)
+    if seams:
+        on_seam[df.sindex.query(seams, predicate="intersects")[1]] = True
+
+    return pd.concat(
+        [df[~on_seam], gpd_utils.merge_edge_connected_polygons(df[on_seam])],
+        ignore_index=True,
+    )
+
+
 def polygonise(
     data_array: np.ndarray,
     mask: Optional[np.ndarray] = None,
@@ -121,6 +227,9 @@ def polygonise(
     crs: Optional[str] = None,
     connectivity: int = 4,
     apply_buffer: bool = True,
+    *,
+    tile_size: Optional[int] = None,
+    n_jobs: int = 1,
 ):
     """
     Convert 2D numpy array containing raster data into polygons.
@@ -145,24 +254,40 @@ def polygonise(
         apply_buffer (bool, optional): Apply shapely buffer function to the
         polygons after polygonising. This can fix issues with the
         polygonisation creating invalid geometries.
-
+        tile_size (int, optional): If given, the raster is polygonised in square
+        tiles of `tile_size` pixels, and polygons that were split by the tile
+        boundaries are merged afterwards. This allows to spread the work for large
+        rasters over several processes. Defaults to None, which polygonises the
+        whole raster at once.
+        n_jobs (int, optional): Number of processes to polygonise the tiles with,
+        -1 means one per CPU. Only used if `tile_size` is given. Defaults to 1.
 
     Returns:
         gpd.GeoDataFrame: GeoDataFrame containing polygon objects.
+
+    Raises:
+        ValueError: If `tile_size` is not positive.
     """
     assert connectivity in (4, 8)
+    if tile_size is not None and tile_size <= 0:
+        raise ValueError(f"`tile_size` must be positive, but is {tile_size}.")
     # Note: we handle connectivity=8 differently due to issues with self intersecting
     #  polygons returned from shapely. Instead of using connectivity=8 we use
     #  the stable connectivity=4 and post-process the polygons to achieve connectivity=8
     #  with valid geometries.
-    polygon_generator = shapes(
-        data_array, mask=mask, connectivity=4, transform=transform
-    )
-    results = list(
-        {"properties": {"class_label": int(val)}, "geometry": shape}
-        for shape, val in polygon_generator
-    )
-    df = gpd.GeoDataFrame.from_features(results, crs=crs)
+    if tile_size is None:
+        polygon_generator = shapes(
+            data_array, mask=mask, connectivity=4, transform=transform
+        )
+        results = list(
+            {"properties": {"class_label": int(val)}, "geometry": shape}
+            for shape, val in polygon_generator
+        )
+        df = gpd.GeoDataFrame.from_features(results, crs=crs)
+    else:
+        df = _polygonise_tiled(
+            data_array, mask, transform, crs, tile_size=tile_size, n_jobs=n_jobs
+        )
 
     if apply_buffer:
         # Redraw geometries to ensure polygons are valid.
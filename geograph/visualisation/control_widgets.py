@@ -665,8 +665,8 @@ class MetricsWidget(BaseControlWidget):
                     }
                 else:
                     information = {}
-                information["Number of edges"] = len(graph.graph.edges())
-                information["Number of nodes"] = len(graph.graph.nodes())
+                information["Number of edges"] = graph.number_of_edges()
+                information["Number of nodes"] = graph.number_of_nodes()
 
                 for info_name, info_value in information.items():
                     metrics_str += "</br><b>{}:</b> {}".format(info_name, info_value)
@@ -677,7 +677,8 @@ class MetricsWidget(BaseControlWidget):
                 # may lead to inefficiency
                 metrics_str += widget_utils.create_html_header("Metrics", level=2).value
                 if metrics:
-                    for metric in metrics:
+                    for metric_name in metrics:
+                        metric = graph.get_metric(metric_name)
                         metrics_str += "</br><b>{}:</b> {:.2f}".format(
                             metric.name, metric.value
                         )
@@ -104,7 +104,9 @@ def add_graph_to_folium_map(
 
     # Adding graph data
     if graph is not None:
-        node_gdf, edge_gdf = graph_utils.create_node_edge_geometries(graph, crs=crs)
+        graph_gdf = graph_utils.create_node_edge_geometries(graph, crs=crs)
+        node_gdf = graph_gdf[graph_gdf["kind"] == "node"]
+        edge_gdf = graph_gdf[graph_gdf["kind"] == "edge"]
 
         # add graph edges to map
         if not edge_gdf.empty:
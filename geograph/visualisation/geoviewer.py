@@ -5,12 +5,13 @@ from __future__ import annotations
 import logging
 import threading
 import time
-from typing import TYPE_CHECKING, List, Optional, Union
+from typing import TYPE_CHECKING, List, Optional, Tuple, Union
 
 import folium
 import geograph
 import ipyleaflet
 import ipywidgets as widgets
+import numpy as np
 import pandas as pd
 import traitlets
 from geograph import metrics
@@ -108,7 +109,11 @@ class GeoGraphViewer(ipyleaflet.Map):
             ),
             graphs=dict(),
         )
-        self.layer_style = style.DEFAULT_LAYER_STYLE
+        # Flat index of all (type, name, subtype) entries in layer_dict
+        self._layer_index: List[Tuple[str, str, str]] = [
+            ("maps", "OpenStreetMap", "map")
+        ]
+        self.layer_style = style.unfreeze(style.DEFAULT_LAYER_STYLE)
 
         self.graph_subtypes = [
             "pgons",
@@ -153,15 +158,9 @@ class GeoGraphViewer(ipyleaflet.Map):
 
     def hide_all_layers(self) -> None:
         """ Hide all layers in self.layer_dict."""
-        for layer_type, type_dict in self.layer_dict.items():
-            for layer_name in type_dict:
-                if layer_type == "maps":
-                    self.set_layer_visibility(layer_type, layer_name, "map", False)
-                elif layer_type == "graphs":
-                    for layer_subtype in self.graph_subtypes:
-                        self.set_layer_visibility(
-                            layer_type, layer_name, layer_subtype, False
-                        )
+        self.logger.debug("Hiding all layers.")
+        for layer_type, layer_name, layer_subtype in self._layer_index:
+            self.layer_dict[layer_type][layer_name][layer_subtype]["active"] = False
         self.layer_update()
 
     def add_layer(self, layer: Union[dict, ipyleaflet.Layer], name=None) -> None:
@@ -184,6 +183,7 @@ class GeoGraphViewer(ipyleaflet.Map):
             )
 
         self.layer_dict["maps"][name] = dict(map=dict(layer=layer, active=True))
+        self._layer_index.append(("maps", name, "map"))
         self.layer_update()
 
     def add_graph(
@@ -213,24 +213,46 @@ class GeoGraphViewer(ipyleaflet.Map):
 
         graphs = {name: graph, **graph.habitats}
 
+        # Patch metrics, class labels and WGS84 polygons are shared between the graph
+        # and its habitats, which contain a subset of the same polygons. Hence they
+        # are only computed once for the whole graph.
+        patch_metrics = graph.get_patch_metrics()
+        class_categories = graph.df["class_label"].astype("category").dtype
+        wgs84_geometry = graph.df.geometry.to_crs(WGS84)  # ipyleaflet works with WGS84
+
         for idx, (current_name, current_graph) in enumerate(graphs.items()):
             self.logger.info(
                 "Started adding graph %s of %s: %s", idx + 1, len(graphs), current_name
             )
 
             # Calculate patch metrics for current graph
-            current_graph.get_patch_metrics()
             is_habitat = not current_name == name
+            if not is_habitat:
+                pgon_geometry = wgs84_geometry
+            else:
+                # `iloc` positions of the habitat nodes in the graph, -1 if missing
+                positions = graph.df.index.get_indexer(current_graph.df.index)
+                if np.all(positions >= 0):
+                    metric_columns = patch_metrics.columns.drop("class_label")
+                    current_graph.df[metric_columns] = (
+                        patch_metrics[metric_columns].iloc[positions].to_numpy()
+                    )
+                    pgon_geometry = wgs84_geometry.iloc[positions]
+                else:
+                    current_graph.get_patch_metrics()
+                    pgon_geometry = current_graph.df.geometry.to_crs(WGS84)
 
             # Creating layer with geometries representing graph on map
             self.logger.debug("Creating graph geometries layer (graph_geo_data).")
-            nodes, edges = graph_utils.create_node_edge_geometries(
+            graph_geometries = graph_utils.create_node_edge_geometries(
                 current_graph, crs=self.gpd_crs_code
             )
+            nodes = graph_geometries.geometry[graph_geometries["kind"] == "node"]
+            nodes.index = current_graph.df.index
+            # Node degrees in the order of `nodes`, from the CSR adjacency
+            degrees = np.diff(current_graph.adjacency[0])
             graph_geo_data = ipyleaflet.GeoData(
-                geo_dataframe=edges.append(nodes)
-                .to_frame(name="geometry")
-                .reset_index(),
+                geo_dataframe=graph_geometries,
                 name=current_name + "_graph",
                 **self.layer_style["graph"]
             )
@@ -238,7 +260,11 @@ class GeoGraphViewer(ipyleaflet.Map):
             # Creating choropleth layer for patch polygons
             self.logger.debug("Creating patch polygons layer (pgon_choropleth).")
             pgon_choropleth = self._get_choropleth_from_df(
-                current_graph.df, colname="class_label", **self.layer_style["pgons"]
+                current_graph.df,
+                colname="class_label",
+                categories=class_categories,
+                wgs84_geometry=pgon_geometry,
+                **self.layer_style["pgons"]
             )
 
             # Creating choropleth layer for node identification
@@ -247,12 +273,18 @@ class GeoGraphViewer(ipyleaflet.Map):
                 dynamics_choropleth = self._get_choropleth_from_df(
                     graph_utils.map_dynamic_to_int(current_graph.df),
                     colname="dynamic_class",
-                    **style._NODE_DYNAMICS_STYLE  # pylint: disable=protected-access
+                    wgs84_geometry=pgon_geometry,
+                    **style.unfreeze(
+                        style._NODE_DYNAMICS_STYLE  # pylint: disable=protected-access
+                    )
                 )
                 abs_growth_choropleth = self._get_choropleth_from_df(
                     current_graph.df,
                     colname="absolute_growth",
-                    **style._ABS_GROWTH_STYLE  # pylint: disable=protected-access
+                    wgs84_geometry=pgon_geometry,
+                    **style.unfreeze(
+                        style._ABS_GROWTH_STYLE  # pylint: disable=protected-access
+                    )
                 )
             else:
                 dynamics_choropleth = None
@@ -280,13 +312,10 @@ class GeoGraphViewer(ipyleaflet.Map):
             self.logger.debug(
                 "Creating disconnected node layer (discon_nodes_geo_data)."
             )
-            disconnected = [
-                node
-                for node in current_graph.graph.nodes()
-                if current_graph.graph.degree[node] == 0
-            ]
             discon_nodes_geo_data = ipyleaflet.GeoData(
-                geo_dataframe=nodes.loc[disconnected].to_frame(name="geometry"),
+                geo_dataframe=nodes.iloc[np.flatnonzero(degrees == 0)].to_frame(
+                    name="geometry"
+                ),
                 name=current_name + "_disconnected_nodes",
                 **self.layer_style["disconnected_nodes"]
             )
@@ -295,25 +324,14 @@ class GeoGraphViewer(ipyleaflet.Map):
             self.logger.debug(
                 "Creating poorly connected node layer (poorly_con_nodes_geo_data)."
             )
-            poorly_connected = [
-                node
-                for node in current_graph.graph.nodes()
-                if current_graph.graph.degree[node] == 1
-            ]
             poorly_con_nodes_geo_data = ipyleaflet.GeoData(
-                geo_dataframe=nodes.loc[poorly_connected].to_frame(name="geometry"),
+                geo_dataframe=nodes.iloc[np.flatnonzero(degrees == 1)].to_frame(
+                    name="geometry"
+                ),
                 name=current_name + "_poorly_connected_nodes",
                 **self.layer_style["poorly_connected_nodes"]
             )
 
-            # Getting graph metrics
-            self.logger.debug("Add graph metrics.")
-            graph_metrics = []
-            for metric in self.metrics:
-                graph_metrics.append(
-                    current_graph.get_metric(metric)
-                )  # pylint: disable=protected-access
-
             # Combining all layers and adding them to layer_dict
             self.logger.debug("Assembling layer dict (layer).")
             layer = dict(
@@ -327,13 +345,18 @@ class GeoGraphViewer(ipyleaflet.Map):
                 ),
                 node_dynamics=dict(layer=dynamics_choropleth, active=False),
                 node_change=dict(layer=abs_growth_choropleth, active=False),
-                metrics=graph_metrics,
+                # Metrics are only computed (and cached by the graph) when shown
+                metrics=list(self.metrics),
                 original_graph=current_graph,
             )
             if is_habitat:
                 layer["parent"] = name
 
             self.layer_dict["graphs"][current_name] = layer
+            self._layer_index.extend(
+                ("graphs", current_name, layer_subtype)
+                for layer_subtype in self.graph_subtypes
+            )
             self.logger.info("Finished adding graph: %s.", current_name)
 
         self.current_graph = name
@@ -341,26 +364,45 @@ class GeoGraphViewer(ipyleaflet.Map):
         self.logger.info("Added graph.")
 
     def _get_choropleth_from_df(
-        self, df: gpd.GeoDataFrame, colname: str = "class_label", **choropleth_args
+        self,
+        df: gpd.GeoDataFrame,
+        colname: str = "class_label",
+        categories: Optional[pd.CategoricalDtype] = None,
+        wgs84_geometry: Optional[gpd.GeoSeries] = None,
+        **choropleth_args
     ) -> ipyleaflet.Choropleth:
         """Create ipyleaflet.Choropleth from GeoDataFrame of polygons.
 
         Args:
             df (gpd.GeoDataFrame): dataframe to visualise
             colname (str): name of the column to display as choropleth data
+            categories (pd.CategoricalDtype, optional): categories used to convert a
+                non-numeric column to numbers. Defaults to None, in which case the
+                categories are inferred from the column.
+            wgs84_geometry (gpd.GeoSeries, optional): the polygons of `df` already
+                projected to WGS84. Defaults to None, in which case `df` is projected.
             **choropleth_args: Keywordarguments passed to `ipyleaflet.Choropleth`.
 
         Returns:
             ipyleaflet.Choropleth: choropleth layer
         """
-        geo_data = df.to_crs(WGS84).__geo_interface__  # ipyleaflet works with WGS84
+        # ipyleaflet works with WGS84
+        if wgs84_geometry is None:
+            geo_data = graph_utils.geojson_features(df.to_crs(WGS84))
+        else:
+            geo_data = graph_utils.geojson_features(
+                df.set_geometry(wgs84_geometry.values)
+            )
         if pd.api.types.is_numeric_dtype(df[colname]):
             # for numeric types, display the numeric data directly
-            choro_data = {str(key): val for key, val in df[colname].items()}
+            values = df[colname].to_numpy()
         else:
             # for categorical types, convert to numbers and display those
-            col_as_categories = df[colname].astype("category").cat.codes
-            choro_data = {str(key): val for key, val in col_as_categories.items()}
+            if categories is None:
+                categories = "category"
+            values = df[colname].astype(categories).cat.codes.to_numpy()
+        # choropleth data is keyed by the feature ids, i.e. the stringified index
+        choro_data = dict(zip(df.index.astype(str), values.tolist()))
 
         # create ipyleaflet layer
         choropleth_layer = ipyleaflet.Choropleth(
@@ -422,20 +464,18 @@ class GeoGraphViewer(ipyleaflet.Map):
             radius (float): radius of nodes in graph. Defaults to 10.
             node_color (str): (CSS) color of graph node (e.g. "blue")
         """
-        for name, graph in self.layer_dict["graphs"].items():
-            layer = graph["graph"]["layer"]
+        self.layer_style["graph"]["point_style"]["radius"] = radius
+        self.layer_style["graph"]["style"]["fillColor"] = node_color
 
-            # Below doesn't work because traitlet change not observed
-            # layer.point_style['radius'] = radius
+        for graph in self.layer_dict["graphs"].values():
+            layer = graph["graph"]["layer"]
 
-            self.layer_style["graph"]["point_style"]["radius"] = radius
-            self.layer_style["graph"]["style"]["fillColor"] = node_color
-            layer = ipyleaflet.GeoData(
-                geo_dataframe=layer.geo_dataframe,
-                name=layer.name,
-                **self.layer_style["graph"]
-            )
-            self.layer_dict["graphs"][name]["graph"]["layer"] = layer
+            # Mutating the style dicts in place (e.g. layer.point_style['radius'] =
+            # radius) is not observed, hence new dicts are assigned. This only syncs
+            # the style and does not serialise the geometries again.
+            with layer.hold_trait_notifications():
+                layer.point_style = {**layer.point_style, "radius": radius}
+                layer.style = {**layer.style, "fillColor": node_color}
         self.layer_update()
 
     def enable_graph_controls(self) -> None:
@@ -2,43 +2,107 @@
 
 from __future__ import annotations
 
-from typing import Tuple
+import json
+from typing import Any
 
 import geograph
 import geopandas as gpd
-import shapely.geometry
+import numpy as np
+import pandas as pd
+import shapely
 from geograph.constants import WGS84
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 def create_node_edge_geometries(
     graph: geograph.GeoGraph,
     crs: str = WGS84,
-) -> Tuple[gpd.GeoSeries, gpd.GeoSeries]:
+) -> gpd.GeoDataFrame:
     """Create node and edge geometries for the networkx graph G.
 
-    Returns node and edge geometries in two GeoDataFrames. The output can be used for
-    plotting a graph.
+    Returns node and edge geometries in a single GeoDataFrame, with the column `kind`
+    set to either "edge" or "node". The edges come first, followed by the nodes in
+    the order of `graph.df`. The output can be used for plotting a graph.
 
     Args:
         graph (GeoGraph): graph with nodes and edges
         crs (str, optional): coordinate reference system of graph. Defaults to UTM35N.
 
     Returns:
-        Tuple[gpd.GeoSeries, gpd.GeoSeries]: dataframes of nodes and edges
-            respectively.
+        gpd.GeoDataFrame: dataframe of edges and nodes
     """
 
-    node_geoms = graph.df.geometry.to_crs(crs).representative_point()
-    rep_points = node_geoms.to_dict()
+    # Nodes are placed at the representative points of the projected polygons
+    node_geoms = shapely.point_on_surface(
+        np.asarray(graph.df.geometry.to_crs(crs).values)
+    )
+    node_coords = shapely.get_coordinates(node_geoms)
+
+    indptr, indices = graph.adjacency
+    src = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    is_first = src < indices
+    edge_geoms = shapely.linestrings(
+        np.stack((node_coords[src[is_first]], node_coords[indices[is_first]]), axis=1)
+    )
+
+    return gpd.GeoDataFrame(
+        {"kind": np.repeat(["edge", "node"], [len(edge_geoms), len(node_geoms)])},
+        geometry=np.concatenate((edge_geoms, node_geoms)),
+        crs=crs,
+    )
+
+
+def geojson_features(df: gpd.GeoDataFrame) -> dict:
+    """Return GeoJSON FeatureCollection of `df` as dict.
 
-    edge_lines = {}
-    for idx, (node_a, node_b) in enumerate(graph.graph.edges()):
-        point_a = rep_points[node_a]
-        point_b = rep_points[node_b]
-        edge_lines[idx] = shapely.geometry.LineString([point_a, point_b])
-    edge_geoms = gpd.GeoSeries(edge_lines)
+    Equivalent to `df.__geo_interface__` without the bounding boxes, but the
+    geometries are serialised in bulk with `shapely.to_geojson` instead of feature by
+    feature. If orjson is installed, the JSON is parsed with it, and the properties
+    are passed through it as well, so that timestamps become ISO strings. Property
+    values are not rounded.
 
-    return node_geoms, edge_geoms
+    Args:
+        df (gpd.GeoDataFrame): dataframe to convert. The feature ids are the index
+            of `df` as strings.
+
+    Returns:
+        dict: GeoJSON FeatureCollection
+    """
+    loads = json.loads if orjson is None else orjson.loads
+
+    geometries = shapely.to_geojson(np.asarray(df.geometry.values))
+    geometries[pd.isna(geometries)] = "null"
+    geometries = loads("[" + ",".join(geometries) + "]")
+    properties = pd.DataFrame(df.drop(columns=df.geometry.name)).to_dict("records")
+    if orjson is not None:
+        properties = orjson.loads(
+            orjson.dumps(
+                properties,
+                default=_json_default,
+                option=orjson.OPT_SERIALIZE_NUMPY,
+            )
+        )
+
+    features = [
+        {"id": feature_id, "type": "Feature", "properties": props, "geometry": geometry}
+        for feature_id, props, geometry in zip(
+            df.index.astype(str), properties, geometries
+        )
+    ]
+    return {"type": "FeatureCollection", "features": features}
+
+
+def _json_default(value: Any) -> Any:
+    """Convert pandas values that orjson cannot serialise to JSON types."""
+    if value is pd.NaT:
+        return None
+    if isinstance(value, (pd.Timestamp, pd.Timedelta)):
+        return value.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
 
 
 _NODE_DYNAMIC_TO_INT = {
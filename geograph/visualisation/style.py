@@ -1,5 +1,8 @@
 """Module providing constants that define style of graph visualisation."""
 
+import types
+from typing import Any, Mapping
+
 import branca.colormap
 
 _GRAPH_STYLE = dict(
@@ -71,3 +74,37 @@ DEFAULT_LAYER_STYLE = dict(
     disconnected_nodes=_DISCONNECTED_STYLE,
     poorly_connected_nodes=_POORLY_CONNECTED_STYLE,
 )
+
+
+def _freeze(style: dict) -> types.MappingProxyType:
+    """Return read-only view of (nested) style dict."""
+    return types.MappingProxyType(
+        {
+            key: _freeze(value) if isinstance(value, dict) else value
+            for key, value in style.items()
+        }
+    )
+
+
+def unfreeze(style: Mapping[str, Any]) -> dict:
+    """Return mutable copy of a (nested) frozen style mapping.
+
+    The nested mappings are copied, all other values, such as colormaps, are shared.
+
+    Args:
+        style (Mapping[str, Any]): style, e.g. `DEFAULT_LAYER_STYLE`
+
+    Returns:
+        dict: mutable copy of style
+    """
+    return {
+        key: unfreeze(value) if isinstance(value, Mapping) else value
+        for key, value in style.items()
+    }
+
+
+# Styles are shared by all viewers, hence they are read-only. Use `unfreeze` to get
+# a mutable copy.
+_NODE_DYNAMICS_STYLE = _freeze(_NODE_DYNAMICS_STYLE)
+_ABS_GROWTH_STYLE = _freeze(_ABS_GROWTH_STYLE)
+DEFAULT_LAYER_STYLE = _freeze(DEFAULT_LAYER_STYLE)
@@ -28,13 +28,13 @@ REQUIRES_PYTHON = ">=3.8.0"
 # What packages are required for this module to be executed?
 REQUIRED: List = [
     "numpy",
+    "scipy",
     "pandas",
     "folium",
     "ipyleaflet",
     "tqdm",
-    "geopandas",
-    "shapely",
-    "rtree",
+    "geopandas>=0.12",
+    "shapely>=2.0",
     "rasterio==1.1.8",
     "xarray",
     "networkx",
@@ -42,7 +42,14 @@ REQUIRED: List = [
 
 # What packages are optional?
 EXTRAS: Dict = {
-    # "fancy feature": ["django"],
+    # compiled kernels for node identification
+    "numba": ["numba"],
+    # saving graphs in parquet format
+    "parquet": ["pyarrow"],
+    # saving graphs as zstandard compressed pickles
+    "zstd": ["zstandard"],
+    # faster GeoJSON parsing in the viewer
+    "orjson": ["orjson"],
 }
 
 here = os.path.abspath(os.path.dirname(__file__))